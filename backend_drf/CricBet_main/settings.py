@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +48,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
       "corsheaders.middleware.CorsMiddleware",
+    "accounts.db_router.ReplicaRoutingMiddleware",
     
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -80,11 +83,118 @@ WSGI_APPLICATION = "CricBet_main.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# PostgreSQL when POSTGRES_DB is set, SQLite (for development) otherwise.
+# SQLite allows one writer at a time, so every bet and ledger insert from
+# every worker queues on its lock, and select_for_update does nothing there.
+
+if os.environ.get("POSTGRES_DB"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ["POSTGRES_DB"],
+            "USER": os.environ.get("POSTGRES_USER", ""),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            # Keep connections open between requests and check them before
+            # reuse, so a dropped connection is replaced instead of failing.
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
     }
+    if os.environ.get("DB_POOL"):
+        # psycopg 3 connection pool (pip install "psycopg[pool]"). Pooled
+        # connections replace persistent ones, so CONN_MAX_AGE must be 0.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "20")),
+            "timeout": 10,
+        }
+    if os.environ.get("POSTGRES_REPLICA_HOST"):
+        # Read replica for GET requests (accounts/db_router.py). Tests use
+        # the primary for it, since a test database has no replication.
+        DATABASES["replica"] = {
+            **DATABASES["default"],
+            "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+            "HOST": os.environ["POSTGRES_REPLICA_HOST"],
+            "PORT": os.environ.get("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+            "TEST": {"MIRROR": "default"},
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {
+                # WAL lets reads run alongside the writer; writers wait up to
+                # `timeout` seconds for the lock instead of failing at once,
+                # and take it when the transaction starts (IMMEDIATE) so two
+                # transactions cannot deadlock upgrading from read to write.
+                "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+                "timeout": 20,
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
+    }
+
+DATABASE_ROUTERS = ["accounts.db_router.PrimaryReplicaRouter"]
+# After a user's write, their reads stay on the primary this long so the
+# replica's lag never shows them an old balance.
+DATABASE_REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Live scores are cached here and must be shared by every worker process,
+# so use Redis when REDIS_URL is set and a file-based cache otherwise.
+
+#
+# Active Mines games have had their stake debited, so they get their own
+# "mines" alias that is never culled to make room for scores, balances or
+# auth flags. With Redis, point MINES_REDIS_URL at a database/instance with
+# `maxmemory-policy noeviction` (it defaults to REDIS_URL).
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        },
+        "mines": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("MINES_REDIS_URL", os.environ["REDIS_URL"]),
+            "KEY_PREFIX": "mines",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / ".cache",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        },
+        "mines": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / ".cache" / "mines",
+            # Culling deletes random entries; live games must never be among them.
+            "OPTIONS": {"MAX_ENTRIES": sys.maxsize},
+        },
+    }
+
+LIVE_SCORE_CACHE = {
+    "FRESH_SECONDS": 5,
+    "STALE_SECONDS": 120,
+    "LOCK_SECONDS": 15,
+}
+
+# Active Mines games (accounts/game_state.py). LocalGameStore keeps them in
+# process memory instead; only use it with a single worker.
+MINES_GAME_STORE = {
+    "BACKEND": "accounts.game_state.CacheGameStore",
+    "ALIAS": "mines",
+    "TTL_SECONDS": 3600,
 }
 
 
@@ -135,7 +245,8 @@ REST_FRAMEWORK = {
     
     'DEFAULT_AUTHENTICATION_CLASSES': (
         
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Builds request.user from the token claims, without a User query.
+        'accounts.authentication.StatelessJWTAuthentication',
     )
     
 }
@@ -1,6 +1,6 @@
 from django.contrib import admin
 # 👇 1. Import the WithdrawalRequest model
-from .models import UserProfile,  Transaction, DepositRequest, WithdrawalRequest,Contact,OTP,Matchess
+from .models import UserProfile,  Transaction, DepositRequest, WithdrawalRequest,Contact,OTP,Matchess,ScoreSnapshot
 
 # Register your models here.
 admin.site.register(UserProfile)
@@ -46,4 +46,10 @@ class ContactAdmin(admin.ModelAdmin):
     list_filter = ('resolved',)
     search_fields = ('user__username', 'message')
     readonly_fields = ('user', 'message', 'timestamp')
-
+@admin.register(ScoreSnapshot)
+class ScoreSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('match', 'seq', 'taken_at', 'is_keyframe')
+    list_filter = ('is_keyframe',)
+    search_fields = ('match__match_name',)
+    readonly_fields = ('match', 'seq', 'taken_at', 'is_keyframe', 'changes')
+    ordering = ('match', '-seq')
@@ -0,0 +1,147 @@
+"""
+Asyncio variant of the live score scraper for refreshing many matches at once.
+"""
+
+import asyncio
+import contextlib
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+
+from .scrape_guard import ALLOWED, guard_for
+from .scraper import (
+    FETCH_ERROR, REQUEST_TIMEOUT, ScoreFetch, conditional_headers, handle_score_response, skipped_fetch,
+)
+
+# Concurrent requests allowed against a single scorecard host.
+PER_HOST_LIMIT = 4
+
+
+def make_client(max_connections=20):
+    """
+    An ``httpx.AsyncClient`` with a keep-alive connection pool. Long-lived
+    callers (the ingestion worker) should create one and reuse it.
+    """
+    return httpx.AsyncClient(
+        timeout=REQUEST_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+
+
+_clients = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(client):
+    # Finalized by the loop's shutdown_asyncgens(), which asyncio.run (and so
+    # async_to_sync and ASGI servers) calls before closing the loop.
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+async def shared_client():
+    """
+    The client for request handlers: one per event loop, so concurrent
+    requests share its pooled connections instead of each opening its own.
+    It is closed when the loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is None or entry[0].is_closed:
+        client = make_client()
+        closer = _close_with_loop(client)
+        await closer.__anext__()
+        entry = _clients[loop] = (client, closer)
+    return entry[0]
+
+
+def _as_target(target):
+    if isinstance(target, str):
+        return target, None, None
+    url, team_1, team_2 = target
+    return url, team_1, team_2
+
+
+async def fetch_live_score(client, url, team_1=None, team_2=None, semaphore=None):
+    """
+    Fetch one scorecard page with a conditional request and return a
+    ScoreFetch. Never raises; failures come back as the same error dict
+    ``get_live_score`` returns.
+    """
+    guard = guard_for(url)
+    verdict = guard.acquire()
+    if verdict != ALLOWED:
+        return skipped_fetch(verdict)
+    headers = conditional_headers(url, team_1, team_2)
+    started = None
+    try:
+        async with semaphore or contextlib.nullcontext():
+            # Timed from here so waiting for the host's semaphore is not
+            # counted as fetch time.
+            started = time.monotonic()
+            response = await client.get(url, headers=headers)
+    except Exception:
+        guard.record_failure()
+        return ScoreFetch(dict(FETCH_ERROR), True, time.monotonic() - started if started is not None else 0.0)
+    seconds = time.monotonic() - started
+    guard.record_response(response.status_code, response.headers.get('Retry-After'))
+    if response.status_code >= 400:
+        return ScoreFetch(dict(FETCH_ERROR), True, seconds)
+    result = handle_score_response(
+        url, team_1, team_2, response.status_code, response.headers,
+        response.content, lambda: response.text,
+    )
+    return result._replace(seconds=seconds)
+
+
+async def fetch_live_scores(targets, client=None, deadline=30.0, per_host=PER_HOST_LIMIT):
+    """
+    Scrape several matches concurrently.
+
+    ``targets`` holds URLs or ``(url, team_1, team_2)`` tuples. Returns one
+    ScoreFetch per target, in order. A failing URL only affects its own
+    entry, and anything still running when ``deadline`` seconds have passed
+    is cancelled and reported as an error.
+    """
+    targets = [_as_target(t) for t in targets]
+    if not targets:
+        return []
+
+    owns_client = client is None
+    if owns_client:
+        client = make_client()
+
+    semaphores = {}
+    tasks = []
+    for url, team_1, team_2 in targets:
+        host = urlsplit(url).netloc
+        semaphore = semaphores.setdefault(host, asyncio.Semaphore(per_host))
+        tasks.append(asyncio.create_task(fetch_live_score(client, url, team_1, team_2, semaphore)))
+
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        if owns_client:
+            await client.aclose()
+
+    return [
+        task.result() if task.done() and not task.cancelled() else ScoreFetch(dict(FETCH_ERROR), True, deadline)
+        for task in tasks
+    ]
+
+
+async def get_live_scores(targets, client=None, deadline=30.0, per_host=PER_HOST_LIMIT):
+    """
+    Like ``fetch_live_scores`` but returns just the score dicts, each shaped
+    like ``get_live_score``'s result.
+    """
+    results = await fetch_live_scores(targets, client=client, deadline=deadline, per_host=per_host)
+    return [result.data for result in results]
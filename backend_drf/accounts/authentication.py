@@ -0,0 +1,156 @@
+"""
+Stateless JWT authentication.
+
+Tokens issued by ``CricBetTokenObtainPairSerializer`` carry the user's id,
+profile id, username and active/staff flags. ``StatelessJWTAuthentication``
+builds a ``ClaimsUser`` from those claims instead of loading the ``User``
+row, and ``ClaimsUser.profile`` is a ``UserProfile`` whose fields load only
+when read, so filtering by it or writing through it costs no query.
+
+Being stateless, a token would outlive a deactivated user; so every request
+also checks, in one cache read:
+
+* the user's current active flag (from the database at most once per
+  ``ACTIVE_FLAG_SECONDS``, and written through when the user is saved),
+* ``revoke_user_tokens`` (tokens issued before it are rejected),
+* ``revoke_token`` (a single token's jti on the blocklist).
+
+Tokens without the claims (issued before this, or by
+``RefreshToken.for_user``) fall back to the database lookup.
+"""
+
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import UserProfile
+
+PROFILE_ID_CLAIM = 'profile_id'
+ACTIVE_FLAG_SECONDS = 60
+
+
+def _active_key(user_id):
+    return f"auth:active:{user_id}"
+
+
+def _revoked_before_key(user_id):
+    return f"auth:revoked-before:{user_id}"
+
+
+def _blocked_key(jti):
+    return f"auth:blocked:{jti}"
+
+
+def set_active_flag(user_id, is_active):
+    cache.set(_active_key(user_id), bool(is_active), ACTIVE_FLAG_SECONDS)
+
+
+def revoke_user_tokens(user_id):
+    """
+    Reject every access and refresh token the user was issued until now.
+    """
+    lifetime = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+    cache.set(_revoked_before_key(user_id), int(time.time()), int(lifetime) + 1)
+
+
+def revoke_token(token):
+    """
+    Put one validated token on the blocklist until it expires.
+    """
+    remaining = int(token['exp'] - time.time()) + 1
+    if remaining > 0:
+        cache.set(_blocked_key(token[api_settings.JTI_CLAIM]), True, remaining)
+
+
+def check_token_allowed(user_id, token):
+    keys = [_active_key(user_id), _revoked_before_key(user_id), _blocked_key(token[api_settings.JTI_CLAIM])]
+    active_key, revoked_key, blocked_key = keys
+    values = cache.get_many(keys)
+
+    is_active = values.get(active_key)
+    if is_active is None:
+        is_active = User.objects.filter(pk=user_id).values_list('is_active', flat=True).first()
+        if is_active is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        set_active_flag(user_id, is_active)
+    if not is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    revoked_before = values.get(revoked_key)
+    if values.get(blocked_key) or (revoked_before is not None and token['iat'] <= revoked_before):
+        raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+
+class ClaimsUser(TokenUser):
+    """
+    Authenticated user built from token claims, with no database row loaded.
+    """
+
+    @cached_property
+    def id(self):
+        # simplejwt issues the claim as a string; ``pk`` follows ``id``.
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+    @cached_property
+    def profile_id(self):
+        return self.token[PROFILE_ID_CLAIM]
+
+    @cached_property
+    def profile(self):
+        # Only the keys are set; balance loads from the database if read.
+        return UserProfile.from_db(None, ['id', 'user_id'], [self.profile_id, self.id])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if PROFILE_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user = ClaimsUser(validated_token)
+        check_token_allowed(user.id, validated_token)
+        return user
+
+
+async def aauthenticate(request):
+    """
+    ``StatelessJWTAuthentication`` for async Django views, which DRF does not
+    run. Returns ``(user, token)`` or None and raises ``AuthenticationFailed``
+    like the DRF class.
+    """
+    return await sync_to_async(StatelessJWTAuthentication().authenticate)(request)
+
+
+class CricBetTokenObtainPairSerializer(TokenObtainPairSerializer):
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[PROFILE_ID_CLAIM] = user.profile.pk
+        token['username'] = user.username
+        token['is_active'] = user.is_active
+        token['is_staff'] = user.is_staff
+        return token
+
+
+class CricBetTokenRefreshSerializer(TokenRefreshSerializer):
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            check_token_allowed(user_id, refresh)
+        return super().validate(attrs)
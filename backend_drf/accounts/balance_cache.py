@@ -0,0 +1,76 @@
+"""
+Per-user balance cache for the polled balance endpoint.
+
+Each user has a cached ``(version, balance)`` entry and a version counter.
+An entry is only served while its version equals the counter, and every
+balance change bumps the counter twice: when the row is written (so no one
+is served the old balance from then on) and again after commit, when the
+new balance is written through if the writer knows it. A reader that missed
+in between and cached the pre-commit balance is invalidated by the second
+bump.
+
+Every code path that changes ``UserProfile.balance`` must call
+``balance_changed`` inside its transaction; ``UserProfile.save()`` does so
+through a post_save signal, ``.update()`` callers do it themselves.
+"""
+
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+
+ENTRY_SECONDS = 600
+
+
+def _keys(user_id):
+    return f"balance:{user_id}", f"balance:{user_id}:version"
+
+
+def _bump(version_key):
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        # Counter missing or evicted: restart it somewhere no old entry can
+        # be, rather than at a small number an old entry may still carry.
+        cache.add(version_key, time.time_ns(), None)
+        return cache.incr(version_key)
+
+
+def get_balance(user_id, load):
+    """
+    The user's balance, from the cache or from ``load()`` on a miss.
+    """
+    entry_key, version_key = _keys(user_id)
+    values = cache.get_many([entry_key, version_key])
+    version = values.get(version_key)
+    if version is None:
+        version = _bump(version_key)
+    entry = values.get(entry_key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    balance = load()
+    # Stored under the version read before the load: if the balance changed
+    # meanwhile, the counter has moved on and this entry is never served.
+    # Not from inside a transaction, which may see its own uncommitted write.
+    if not transaction.get_connection().in_atomic_block:
+        cache.set(entry_key, (version, balance), ENTRY_SECONDS)
+    return balance
+
+
+def _publish(user_id, balance):
+    entry_key, version_key = _keys(user_id)
+    version = _bump(version_key)
+    if balance is not None:
+        cache.set(entry_key, (version, balance), ENTRY_SECONDS)
+
+
+def balance_changed(user_id, balance=None):
+    """
+    Record a balance write by the current transaction. Pass the new balance
+    when it is known (not an F() update) to write it through on commit.
+    """
+    if not isinstance(balance, Decimal):
+        balance = None
+    _bump(_keys(user_id)[1])
+    transaction.on_commit(lambda: _publish(user_id, balance))
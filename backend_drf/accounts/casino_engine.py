@@ -0,0 +1,131 @@
+"""
+Random outcomes for the casino games.
+
+``OutcomeEngine`` draws dice, coin flips and mine layouts from a generator
+seeded from the OS CSPRNG. Single draws are served from a buffer that is
+refilled in batches, so a request costs a list pop instead of a generator
+call. NumPy's PCG64 is used when NumPy is installed; otherwise the standard
+library generator is used. ``get_engine()`` gives each thread its own engine.
+"""
+
+import random
+import secrets
+import threading
+
+from .game_state import GRID_SIZE, mask_from_tiles
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional.
+    np = None
+
+DIE_SIDES = 6
+BATCH_SIZE = 4096
+
+
+class OutcomeEngine:
+
+    def __init__(self, seed=None, use_numpy=None, batch_size=BATCH_SIZE):
+        self.seed = seed if seed is not None else secrets.randbits(128)
+        self.use_numpy = np is not None if use_numpy is None else (use_numpy and np is not None)
+        self.batch_size = batch_size
+        self._rng = np.random.default_rng(self.seed) if self.use_numpy else random.Random(self.seed)
+        self._dice = []
+        self._coins = []
+
+    # -- batches --
+
+    def dice_batch(self, n):
+        """
+        ``n`` rolls of two dice, as a list of ``[die1, die2]``.
+        """
+        if self.use_numpy:
+            return self.dice_array(n).tolist()
+        faces = self._rng.choices(range(1, DIE_SIDES + 1), k=2 * n)
+        return [faces[i:i + 2] for i in range(0, 2 * n, 2)]
+
+    def coin_batch(self, n):
+        """
+        ``n`` coin flips, as a list of 0 (heads) / 1 (tails).
+        """
+        if self.use_numpy:
+            return self.coin_array(n).tolist()
+        if not n:
+            return []
+        return list(map(int, format(self._rng.getrandbits(n), f'0{n}b')))
+
+    # -- NumPy arrays, for simulations (NumPy engines only) --
+
+    def dice_array(self, n):
+        """
+        ``n`` rolls as an ``(n, 2)`` array.
+        """
+        return self._rng.integers(1, DIE_SIDES + 1, size=(n, 2))
+
+    def coin_array(self, n):
+        return self._rng.integers(0, 2, size=n)
+
+    def mine_mask_array(self, n, mines):
+        """
+        ``n`` mine masks, from the same partial shuffle as ``mine_tiles``
+        run on every row at once.
+        """
+        spans = np.arange(GRID_SIZE, GRID_SIZE - mines, -1)
+        offsets = (self._rng.random((n, mines)) * spans).astype(np.int64)
+        tiles = np.tile(np.arange(GRID_SIZE, dtype=np.int64), (n, 1))
+        rows = np.arange(n)
+        for i in range(mines):
+            j = i + offsets[:, i]
+            swapped = tiles[rows, i].copy()
+            tiles[rows, i] = tiles[rows, j]
+            tiles[rows, j] = swapped
+        return np.bitwise_or.reduce(np.left_shift(1, tiles[:, :mines]), axis=1)
+
+    # -- single draws, served from the batches --
+
+    def roll_dice(self):
+        if not self._dice:
+            self._dice = self.dice_batch(self.batch_size)
+        return self._dice.pop()
+
+    def flip_coin(self):
+        if not self._coins:
+            self._coins = self.coin_batch(self.batch_size)
+        return self._coins.pop()
+
+    def mine_tiles(self, mines):
+        """
+        ``mines`` distinct tiles: the first ``mines`` steps of a Fisher-Yates
+        shuffle of the grid, so the cost is fixed however many mines there are.
+        """
+        if self.use_numpy:
+            spans = np.arange(GRID_SIZE, GRID_SIZE - mines, -1)
+            offsets = (self._rng.random(mines) * spans).astype(np.int64).tolist()
+        else:
+            offsets = [self._rng.randrange(GRID_SIZE - i) for i in range(mines)]
+        return _partial_shuffle(offsets)
+
+    def mine_mask(self, mines):
+        return mask_from_tiles(self.mine_tiles(mines))
+
+
+def _partial_shuffle(offsets):
+    tiles = list(range(GRID_SIZE))
+    for i, offset in enumerate(offsets):
+        j = i + offset
+        tiles[i], tiles[j] = tiles[j], tiles[i]
+    return tiles[:len(offsets)]
+
+
+_local = threading.local()
+
+
+def get_engine():
+    """
+    This thread's engine (engines are not thread-safe).
+    """
+    engine = getattr(_local, 'engine', None)
+    if engine is None:
+        engine = _local.engine = OutcomeEngine()
+    return engine
+
@@ -0,0 +1,118 @@
+"""
+Send read-only requests to the read replica.
+
+``ReplicaRoutingMiddleware`` marks GET/HEAD/OPTIONS requests as replica
+readable; everything else (bets, deposits, withdrawals, login) and all code
+outside a request (workers, management commands, signals) stays on the
+primary. ``PrimaryReplicaRouter`` routes reads by that mark.
+
+Replication lag: after a user's write request, their reads stay on the
+primary for ``DATABASE_REPLICA_PIN_SECONDS`` so they see their own balance
+and history. A request that writes part way through reads from the primary
+for the rest of the request.
+"""
+
+from contextvars import ContextVar
+
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def pin_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+
+
+def _pin_key(user_id):
+    return f"db-pin:{user_id}"
+
+
+def request_user_id(request):
+    """
+    User id from the request's bearer token, without verifying it. It only
+    decides which database serves the reads; authentication still verifies
+    the token.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        claims = jwt.decode(header[7:], options={'verify_signature': False})
+    except jwt.PyJWTError:
+        return None
+    return claims.get(jwt_settings.USER_ID_CLAIM)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return REPLICA if _read_from_replica.get() else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # Read your own writes for the rest of the request.
+        _read_from_replica.set(False)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both aliases.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        """
+        Returns ``(user_id, token)``; ``token`` resets the routing mark.
+        """
+        if not replica_configured():
+            return None, None
+        user_id = request_user_id(request)
+        replica = request.method in SAFE_METHODS and not (
+            user_id is not None and cache.get(_pin_key(user_id))
+        )
+        return user_id, _read_from_replica.set(replica)
+
+    def _finish(self, request, user_id, token):
+        if token is None:
+            return
+        _read_from_replica.reset(token)
+        if user_id is not None and request.method not in SAFE_METHODS:
+            cache.set(_pin_key(user_id), 1, pin_seconds())
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user_id, token = self._start(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(request, user_id, token)
+
+    async def __acall__(self, request):
+        user_id, token = self._start(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self._finish(request, user_id, token)
@@ -0,0 +1,211 @@
+"""
+Mines game state, kept out of the session table.
+
+An active game is stored under its bet id with a TTL, plus a per-user key
+pointing at the user's current bet. The grid is encoded as two 25-bit masks
+(mines and revealed tiles), so a game is a few integers rather than a list
+of 25 dicts. The backend is chosen by ``MINES_GAME_STORE['BACKEND']``:
+``CacheGameStore`` uses a Django cache of its own (the ``mines`` alias;
+Redis in production, shared by all workers), which must never evict or
+cull entries: a lost game is a lost stake. ``LocalGameStore`` keeps games
+in process memory for tests and single-process runs.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+GRID_SIZE = 25
+
+_DEFAULTS = {
+    'BACKEND': 'accounts.game_state.CacheGameStore',
+    'ALIAS': 'mines',
+    # An abandoned game is forgotten (and its stake lost) after this.
+    'TTL_SECONDS': 3600,
+}
+
+
+def config(name):
+    return getattr(settings, 'MINES_GAME_STORE', {}).get(name, _DEFAULTS[name])
+
+
+def mask_from_tiles(tiles):
+    mask = 0
+    for tile in tiles:
+        mask |= 1 << tile
+    return mask
+
+
+def tiles_from_mask(mask):
+    return [tile for tile in range(GRID_SIZE) if mask >> tile & 1]
+
+
+@dataclass
+class MinesGame:
+    bet_id: int
+    user_id: int
+    mine_mask: int
+    revealed_mask: int = 0
+
+    @property
+    def mines(self):
+        return self.mine_mask.bit_count()
+
+    @property
+    def safe_reveals(self):
+        return self.revealed_mask.bit_count()
+
+    def is_mine(self, tile):
+        return bool(self.mine_mask >> tile & 1)
+
+    def is_revealed(self, tile):
+        return bool(self.revealed_mask >> tile & 1)
+
+    def encode(self):
+        return (self.user_id, self.mine_mask, self.revealed_mask)
+
+    @classmethod
+    def decode(cls, bet_id, value):
+        user_id, mine_mask, revealed_mask = value
+        return cls(bet_id, user_id, mine_mask, revealed_mask)
+
+
+class BaseGameStore:
+    """
+    ``start`` saves a new game and makes it the user's active one; ``save``
+    updates it; ``finish`` removes it and returns it only to the one caller
+    that actually removed it, so a game cannot be settled twice.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else config('TTL_SECONDS')
+
+    @staticmethod
+    def game_key(bet_id):
+        return f"mines:game:{bet_id}"
+
+    @staticmethod
+    def active_key(user_id):
+        return f"mines:active:{user_id}"
+
+    def get(self, bet_id):
+        raise NotImplementedError
+
+    def active_for(self, user_id):
+        raise NotImplementedError
+
+    def start(self, game):
+        raise NotImplementedError
+
+    def save(self, game):
+        raise NotImplementedError
+
+    def finish(self, game):
+        raise NotImplementedError
+
+
+class CacheGameStore(BaseGameStore):
+
+    def __init__(self, alias=None, ttl=None):
+        super().__init__(ttl)
+        self.alias = alias or config('ALIAS')
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, bet_id):
+        value = self.cache.get(self.game_key(bet_id))
+        return MinesGame.decode(bet_id, value) if value is not None else None
+
+    def active_for(self, user_id):
+        bet_id = self.cache.get(self.active_key(user_id))
+        return self.get(bet_id) if bet_id is not None else None
+
+    def start(self, game):
+        self.cache.set_many({
+            self.game_key(game.bet_id): game.encode(),
+            self.active_key(game.user_id): game.bet_id,
+        }, self.ttl)
+
+    def save(self, game):
+        self.cache.set(self.game_key(game.bet_id), game.encode(), self.ttl)
+
+    def finish(self, game):
+        if not self.cache.delete(self.game_key(game.bet_id)):
+            return None
+        if self.cache.get(self.active_key(game.user_id)) == game.bet_id:
+            self.cache.delete(self.active_key(game.user_id))
+        return game
+
+
+class LocalGameStore(BaseGameStore):
+    """
+    In-process store. Only correct with a single worker process.
+    """
+
+    def __init__(self, ttl=None):
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def _set(self, key, value):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def get(self, bet_id):
+        with self._lock:
+            value = self._get(self.game_key(bet_id))
+        return MinesGame.decode(bet_id, value) if value is not None else None
+
+    def active_for(self, user_id):
+        with self._lock:
+            bet_id = self._get(self.active_key(user_id))
+        return self.get(bet_id) if bet_id is not None else None
+
+    def start(self, game):
+        with self._lock:
+            self._set(self.game_key(game.bet_id), game.encode())
+            self._set(self.active_key(game.user_id), game.bet_id)
+
+    def save(self, game):
+        with self._lock:
+            self._set(self.game_key(game.bet_id), game.encode())
+
+    def finish(self, game):
+        with self._lock:
+            if self._get(self.game_key(game.bet_id)) is None:
+                return None
+            del self._entries[self.game_key(game.bet_id)]
+            if self._get(self.active_key(game.user_id)) == game.bet_id:
+                del self._entries[self.active_key(game.user_id)]
+        return game
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    The configured game store, built once per process.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(config('BACKEND'))()
+    return _store
@@ -0,0 +1,49 @@
+"""
+Dice and Coin Flip rules, shared by the bet views and ``simulate_casino``.
+
+Payouts are lookup tables (dice: by choice and sum of the two dice; coin:
+by whether the call matched), so a round in a view and a vector of rounds in
+the simulation go through the same numbers.
+"""
+
+from .casino_engine import DIE_SIDES, get_engine
+
+DICE_CHOICES = ('under', 'over', '7')
+COIN_SIDES = ('heads', 'tails')
+COIN_MULTIPLIER = 2
+
+# DICE_MULTIPLIERS[choice][die1 + die2]: 2x under or over 7, 5x on exactly 7.
+DICE_MULTIPLIERS = {
+    'under': tuple(2 if 2 <= total < 7 else 0 for total in range(2 * DIE_SIDES + 1)),
+    'over': tuple(2 if total > 7 else 0 for total in range(2 * DIE_SIDES + 1)),
+    '7': tuple(5 if total == 7 else 0 for total in range(2 * DIE_SIDES + 1)),
+}
+
+
+def roll_dice(choice, engine=None):
+    """
+    Roll two dice. Returns ``(die1, die2, payout_multiplier)``.
+    """
+    die1, die2 = (engine or get_engine()).roll_dice()
+    return die1, die2, DICE_MULTIPLIERS[choice][die1 + die2] if choice in DICE_MULTIPLIERS else 0
+
+
+def flip_coin(choice, engine=None):
+    """
+    Flip a coin. Returns ``(outcome, payout_multiplier)``.
+    """
+    outcome = COIN_SIDES[(engine or get_engine()).flip_coin()]
+    return outcome, COIN_MULTIPLIER if choice == outcome else 0
+
+
+def dice_rtp(choice):
+    """
+    Exact expected return per unit staked, over the 36 equally likely rolls.
+    """
+    table = DICE_MULTIPLIERS[choice]
+    rolls = [a + b for a in range(1, DIE_SIDES + 1) for b in range(1, DIE_SIDES + 1)]
+    return sum(table[total] for total in rolls) / len(rolls)
+
+
+def coin_rtp():
+    return COIN_MULTIPLIER / len(COIN_SIDES)
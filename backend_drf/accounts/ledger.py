@@ -0,0 +1,103 @@
+"""
+Ledger (Transaction) rows for casino bets, written with bulk inserts.
+
+Every casino bet produces a ``bet_placed`` row and, when it paid out, a
+``bet_won`` row. ``record_casino_bets`` inserts a batch of bets and all of
+their ledger rows with one ``bulk_create`` each, and updates the
+``accounts.stats`` rollups in the same transaction; ``LedgerBuffer`` batches
+bets across a loop and flushes on size or age.
+"""
+
+import time
+
+from django.db import transaction
+
+from .models import CasinoBet, Transaction
+from .stats import record_bets
+
+
+def ledger_rows_for_bet(bet):
+    """
+    Unsaved Transaction rows for one CasinoBet.
+    """
+    rows = [Transaction(
+        user_profile_id=bet.user_profile_id,
+        transaction_type='bet_placed',
+        amount=bet.bet_amount,
+    )]
+    if bet.winnings > 0:
+        rows.append(Transaction(
+            user_profile_id=bet.user_profile_id,
+            transaction_type='bet_won',
+            amount=bet.winnings,
+        ))
+    return rows
+
+
+def write_bet_ledger(bets):
+    """
+    Insert the ledger rows of already-saved bets with one bulk_create.
+    """
+    rows = [row for bet in bets for row in ledger_rows_for_bet(bet)]
+    if rows:
+        Transaction.objects.bulk_create(rows)
+    return rows
+
+
+def record_casino_bets(bets):
+    """
+    Insert unsaved CasinoBet objects and their ledger rows: one bulk_create
+    for the bets and one for the ledger. bulk_create skips post_save, so the
+    per-bet signal does not run for these.
+    """
+    bets = list(bets)
+    if not bets:
+        return bets
+    # No savepoint: inside a caller's atomic block this joins it, otherwise
+    # it opens its own transaction.
+    with transaction.atomic(savepoint=False):
+        CasinoBet.objects.bulk_create(bets)
+        write_bet_ledger(bets)
+        record_bets(bets)
+    return bets
+
+
+class LedgerBuffer:
+    """
+    Collect unsaved CasinoBets and write them in batches.
+
+    Use it inside the ``transaction.atomic()`` block that changes the
+    balance: it flushes every ``max_bets`` bets or ``max_seconds`` seconds,
+    and once more on exit, so bets, ledger and balance commit or roll back
+    together.
+    """
+
+    def __init__(self, max_bets=500, max_seconds=1.0):
+        self.max_bets = max_bets
+        self.max_seconds = max_seconds
+        self.pending = []
+        self.written = 0
+        self._oldest = None
+
+    def __enter__(self):
+        if not transaction.get_connection().in_atomic_block:
+            raise RuntimeError("LedgerBuffer must be used inside transaction.atomic().")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def add(self, bet):
+        if not self.pending:
+            self._oldest = time.monotonic()
+        self.pending.append(bet)
+        if len(self.pending) >= self.max_bets or time.monotonic() - self._oldest >= self.max_seconds:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            record_casino_bets(self.pending)
+            self.written += len(self.pending)
+            self.pending = []
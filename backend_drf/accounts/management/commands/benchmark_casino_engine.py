@@ -0,0 +1,44 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.casino_engine import OutcomeEngine, np
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure casino outcomes per second: one random call per outcome (the "
+        "old views), OutcomeEngine single and batched draws and mine layouts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--draws', type=int, default=200_000, help="Outcomes per measurement.")
+
+    def handle(self, *args, **options):
+        n = options['draws']
+        engines = [('stdlib', OutcomeEngine(use_numpy=False))]
+        if np is not None:
+            engines.append(('numpy', OutcomeEngine(use_numpy=True)))
+        else:
+            self.stdout.write("NumPy is not installed; only the stdlib engine is measured.")
+
+        self.report("dice, random.randint per die", n, lambda: [
+            (random.randint(1, 6), random.randint(1, 6)) for _ in range(n)
+        ])
+        self.report("coin, random.choice per flip", n, lambda: [
+            random.choice(('heads', 'tails')) for _ in range(n)
+        ])
+        for name, engine in engines:
+            self.report(f"dice, {name} single", n, lambda: [engine.roll_dice() for _ in range(n)])
+            self.report(f"dice, {name} batch", n, lambda: engine.dice_batch(n))
+            self.report(f"coin, {name} single", n, lambda: [engine.flip_coin() for _ in range(n)])
+            self.report(f"coin, {name} batch", n, lambda: engine.coin_batch(n))
+            layouts = max(1, n // 10)
+            self.report(f"mines (24), {name}", layouts, lambda: [engine.mine_mask(24) for _ in range(layouts)])
+
+    def report(self, label, count, draw):
+        start = time.perf_counter()
+        draw()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{label:<34} {count / elapsed:>14,.0f} outcomes/s")
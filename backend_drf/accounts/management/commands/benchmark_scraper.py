@@ -0,0 +1,47 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.scraper import parse_live_score, parse_live_score_legacy
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / 'scraper_fixtures'
+
+
+class Command(BaseCommand):
+    help = (
+        "Time parse_live_score against the original find_all parser on saved "
+        "scorecard pages and check both return the same dict."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'pages', nargs='*',
+            help=f"HTML files to parse (default: every .html file in {FIXTURES_DIR}).",
+        )
+        parser.add_argument('--rounds', type=int, default=50, help="Parses per page per parser.")
+
+    def handle(self, *args, **options):
+        pages = [Path(p) for p in options['pages']] or sorted(FIXTURES_DIR.glob('*.html'))
+        if not pages:
+            raise CommandError("No scorecard pages to benchmark.")
+        rounds = options['rounds']
+
+        for page in pages:
+            html = page.read_text(encoding='utf-8')
+            expected = parse_live_score_legacy(html)
+            if parse_live_score(html) != expected:
+                raise CommandError(f"{page.name}: parse_live_score output differs from the legacy parser.")
+
+            legacy_ms = self.time_parser(parse_live_score_legacy, html, rounds)
+            fast_ms = self.time_parser(parse_live_score, html, rounds)
+            self.stdout.write(
+                f"{page.name} ({len(html) // 1024} KiB): legacy {legacy_ms:.2f} ms, "
+                f"single-pass {fast_ms:.2f} ms, {legacy_ms / fast_ms:.1f}x faster"
+            )
+
+    def time_parser(self, parser, html, rounds):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            parser(html)
+        return (time.perf_counter() - started) * 1000 / rounds
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+
+from accounts import score_cache, score_history
+from accounts.async_scraper import fetch_live_scores, make_client
+from accounts.models import Matchess
+from accounts.scraper import HOST_UNAVAILABLE
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Poll the scorecard page of every Active match and publish the parsed "
+        "score to the shared score store read by the score endpoints. Score "
+        "changes are also appended to each match's score history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Seconds between scrapes of the same match (default: LIVE_SCORE_CACHE['FRESH_SECONDS']).",
+        )
+        parser.add_argument(
+            '--reload', type=float, default=30.0,
+            help="Seconds between re-reading the list of Active matches.",
+        )
+        parser.add_argument(
+            '--deadline', type=float, default=20.0,
+            help="Seconds one refresh round may take before slow pages are given up on.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Scrape every Active match once and exit.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            asyncio.run(self.run(options))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
+
+    async def run(self, options):
+        interval = options['interval'] or score_cache.config('FRESH_SECONDS')
+        async with make_client() as client:
+            if options['once']:
+                await self.ingest(client, await self.active_matches(), options['deadline'])
+                return
+
+            self.stdout.write(f"Ingesting live scores every {interval}s (Ctrl+C to stop).")
+            matches, next_due, reload_at = {}, {}, 0.0
+            while True:
+                try:
+                    now = time.monotonic()
+                    if now >= reload_at:
+                        matches = {m.id: m for m in await self.active_matches()}
+                        # Spread new matches across the interval instead of
+                        # scraping them all in the same instant.
+                        for offset, match_id in enumerate(m for m in matches if m not in next_due):
+                            next_due[match_id] = now + interval * offset / max(len(matches), 1)
+                        for match_id in set(next_due) - set(matches):
+                            del next_due[match_id]
+                        reload_at = now + options['reload']
+
+                    due = [matches[m] for m, at in next_due.items() if at <= time.monotonic()]
+                    if due:
+                        # Every match that is due is refreshed concurrently.
+                        await self.ingest(client, due, options['deadline'])
+                        for match in due:
+                            next_due[match.id] = time.monotonic() + interval
+
+                    wake_at = min([reload_at, *next_due.values()])
+                except Exception:
+                    # A database, cache or scraper error must not end the
+                    # worker: every score endpoint would go stale. What
+                    # failed is still due and is retried next round.
+                    logger.exception("Live score ingest round failed; retrying in %ss.", interval)
+                    wake_at = time.monotonic() + interval
+                await asyncio.sleep(max(0.0, wake_at - time.monotonic()))
+
+    async def active_matches(self):
+        queryset = Matchess.objects.filter(match_status='Active').exclude(url='').only('id', 'match_name', 'url', 'Team1', 'Team2')
+        return [match async for match in queryset]
+
+    async def ingest(self, client, matches, deadline):
+        results = await fetch_live_scores(
+            [(m.url, m.Team1, m.Team2) for m in matches], client=client, deadline=deadline,
+        )
+        # Scrapes skipped by the rate limit leave the stored score as it is.
+        fetched = [(match, result) for match, result in zip(matches, results) if not result.throttled]
+        # Async cache writes, so a slow cache does not stall the event loop.
+        await asyncio.gather(*[
+            score_cache.apublish(match.url, result.data, match.Team1, match.Team2, changed=result.changed)
+            for match, result in fetched
+        ])
+        changed = []
+        for match, result in fetched:
+            if result.data != HOST_UNAVAILABLE:
+                # Each fetch's own time; skipped scrapes sent no request.
+                score_cache.stats.observe_fetch(result.seconds, 'error' in result.data)
+            if 'error' in result.data:
+                self.stderr.write(f"{match}: {result.data['error']}")
+            elif result.changed:
+                changed.append((match.id, result.data))
+        if changed:
+            await sync_to_async(self.record_history)(changed)
+
+    def record_history(self, changed):
+        for match_id, data in changed:
+            score_history.record(match_id, data)
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import UserGameDailyStats, UserProfile, UserStats
+from accounts.stats import DAILY_FIELDS, STATS_FIELDS, empty_totals, rebuild_rollups, write_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the UserStats / UserGameDailyStats rollups from CasinoBet, "
+        "Transaction and WithdrawalRequest and report rows that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Replace the rollups with the rebuilt values.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            expected_stats, expected_daily = self.rebuild()
+            actual_stats, actual_daily = self.current()
+
+        drifted_stats = self.report('UserStats', expected_stats, actual_stats, STATS_FIELDS)
+        drifted_daily = self.report('UserGameDailyStats', expected_daily, actual_daily, DAILY_FIELDS)
+        drift = len(drifted_stats) + len(drifted_daily)
+
+        if drift and options['fix']:
+            drifted = set(drifted_stats) | {key[0] for key in drifted_daily}
+            fixed = sum(self.fix_user(profile_id) for profile_id in sorted(drifted))
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Rollups match the ledger."))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Rewrote the rollups of {fixed} user(s); {drift} row(s) had drifted."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{drift} row(s) drifted; run with --fix to rewrite them."))
+
+    def current(self, profile_ids=None):
+        stats = UserStats.objects.all()
+        daily = UserGameDailyStats.objects.all()
+        if profile_ids is not None:
+            stats = stats.filter(user_profile_id__in=profile_ids)
+            daily = daily.filter(user_profile_id__in=profile_ids)
+        actual_stats = {
+            row.pop('user_profile_id'): row
+            for row in stats.values('user_profile_id', *STATS_FIELDS)
+        }
+        actual_daily = {
+            (row.pop('user_profile_id'), row.pop('game_name'), row.pop('day')): row
+            for row in daily.values('user_profile_id', 'game_name', 'day', *DAILY_FIELDS)
+        }
+        return actual_stats, actual_daily
+
+    def fix_user(self, profile_id):
+        """
+        Rebuild and rewrite one user's rollups while holding their profile
+        and UserStats row locks. Money-moving writes lock the profile (or
+        bump UserStats) before touching the rollups, so none can commit a
+        bump between the rebuild and the rewrite. Returns whether anything
+        was rewritten.
+        """
+        with transaction.atomic():
+            if not UserProfile.objects.select_for_update().filter(pk=profile_id).exists():
+                return False
+            list(UserStats.objects.select_for_update().filter(user_profile_id=profile_id).values_list('pk'))
+
+            expected_stats, expected_daily = self.rebuild([profile_id])
+            if (expected_stats, expected_daily) == self.current([profile_id]):
+                # Fixed itself since the report was taken.
+                return False
+            UserStats.objects.filter(user_profile_id=profile_id).delete()
+            UserGameDailyStats.objects.filter(user_profile_id=profile_id).delete()
+            write_rollups(expected_stats, expected_daily)
+        return True
+
+    def rebuild(self, profile_ids=None):
+        return rebuild_rollups(profile_ids)
+
+    def report(self, label, expected, actual, fields):
+        """
+        Print and return the keys whose rows differ.
+        """
+        drifted = []
+        zero = empty_totals(fields)
+        for key in expected.keys() | actual.keys():
+            want, have = expected.get(key, zero), actual.get(key, zero)
+            diffs = [f"{field} {have[field]} != {want[field]}" for field in fields if have[field] != want[field]]
+            if diffs:
+                drifted.append(key)
+                self.stdout.write(f"{label} {key}: {', '.join(diffs)}")
+        return drifted
@@ -0,0 +1,148 @@
+import math
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.casino_engine import OutcomeEngine, np
+from accounts.game_state import mask_from_tiles
+from accounts.games import COIN_MULTIPLIER, COIN_SIDES, DICE_CHOICES, DICE_MULTIPLIERS, coin_rtp, dice_rtp
+from accounts.mines import multiplier as mines_multiplier, rtp as mines_rtp
+
+CHUNK_SIZE = 1_000_000
+# Mines strategies: (mines, safe reveals before cashing out).
+MINES_STRATEGIES = ((1, 1), (3, 5), (5, 3), (10, 2), (24, 1))
+FAST_ROUNDS = 200_000
+
+
+class RunStats:
+    """
+    Running RTP, variance and worst drawdown of one strategy at a stake of 1,
+    fed chunk by chunk.
+    """
+
+    def __init__(self):
+        self.rounds = 0
+        self.returned = 0.0
+        self.returned_sq = 0.0
+        self.balance = 0.0
+        self.peak = 0.0
+        self.drawdown = 0.0
+
+    def add(self, multipliers):
+        if np is not None and isinstance(multipliers, np.ndarray):
+            net = multipliers - 1.0
+            path = self.balance + np.cumsum(net)
+            peaks = np.maximum(np.maximum.accumulate(path), self.peak)
+            self.drawdown = max(self.drawdown, float((peaks - path).max()))
+            self.peak = float(peaks[-1])
+            self.balance = float(path[-1])
+            self.returned += float(multipliers.sum())
+            self.returned_sq += float(np.square(multipliers).sum())
+        else:
+            for balance in accumulate((m - 1 for m in multipliers), initial=self.balance):
+                self.peak = max(self.peak, balance)
+                self.drawdown = max(self.drawdown, self.peak - balance)
+            self.balance = balance
+            self.returned += sum(multipliers)
+            self.returned_sq += sum(m * m for m in multipliers)
+        self.rounds += len(multipliers)
+
+    @property
+    def rtp(self):
+        return self.returned / self.rounds
+
+    @property
+    def variance(self):
+        # Variance of the per-round net result (same as of the multiplier).
+        return self.returned_sq / self.rounds - self.rtp ** 2
+
+
+class Command(BaseCommand):
+    help = (
+        "Monte Carlo check of the casino payout tables: plays rounds through the "
+        "same outcome engine and payout rules as the bet views and reports RTP "
+        "against the exact value, variance, worst drawdown and rounds/s."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=5_000_000, help="Rounds per strategy.")
+        parser.add_argument('--fast', action='store_true', help=f"{FAST_ROUNDS:,} rounds per strategy (for CI).")
+        parser.add_argument('--game', choices=('dice', 'coin', 'mines'), action='append', help="Only these games.")
+        parser.add_argument('--seed', type=int, help="Seed the engine for a reproducible run.")
+        parser.add_argument(
+            '--tolerance', type=float, default=5.0,
+            help="Fail when a simulated RTP is more than this many standard errors from the exact RTP.",
+        )
+
+    def handle(self, *args, **options):
+        rounds = FAST_ROUNDS if options['fast'] else options['rounds']
+        if rounds < 1:
+            raise CommandError("--rounds must be positive.")
+        engine = OutcomeEngine(seed=options['seed'])
+        if not engine.use_numpy:
+            self.stdout.write("NumPy is not installed; simulating with the stdlib engine (much slower).")
+        games = options['game'] or ('dice', 'coin', 'mines')
+
+        strategies = []
+        if 'dice' in games:
+            strategies += [(f"dice {choice}", dice_rtp(choice), self.dice_round(engine, choice)) for choice in DICE_CHOICES]
+        if 'coin' in games:
+            strategies.append(("coin heads", coin_rtp(), self.coin_round(engine, 'heads')))
+        if 'mines' in games:
+            strategies += [
+                (f"mines {mines} x{reveals}", mines_rtp(mines, reveals), self.mines_round(engine, mines, reveals))
+                for mines, reveals in MINES_STRATEGIES
+            ]
+
+        self.stdout.write(
+            f"{'strategy':<16} {'rounds':>11} {'rtp':>8} {'exact':>8} {'z':>6} "
+            f"{'variance':>10} {'drawdown':>10} {'rounds/s':>12}"
+        )
+        failures = []
+        for label, exact_rtp, play_chunk in strategies:
+            stats = RunStats()
+            start = time.perf_counter()
+            remaining = rounds
+            while remaining:
+                size = min(remaining, CHUNK_SIZE)
+                stats.add(play_chunk(size))
+                remaining -= size
+            elapsed = time.perf_counter() - start
+
+            standard_error = math.sqrt(max(stats.variance, 0.0) / stats.rounds)
+            z = (stats.rtp - exact_rtp) / standard_error if standard_error else 0.0
+            self.stdout.write(
+                f"{label:<16} {stats.rounds:>11,} {stats.rtp:>8.4f} {exact_rtp:>8.4f} {z:>6.2f} "
+                f"{stats.variance:>10.3f} {stats.drawdown:>10,.0f} {stats.rounds / elapsed:>12,.0f}"
+            )
+            if abs(z) > options['tolerance']:
+                failures.append(label)
+
+        if failures:
+            raise CommandError(f"RTP outside tolerance for: {', '.join(failures)}.")
+
+    # Each returns a function playing ``n`` rounds and returning their
+    # payout multipliers, using the tables the views use.
+
+    def dice_round(self, engine, choice):
+        table = DICE_MULTIPLIERS[choice]
+        if engine.use_numpy:
+            lookup = np.asarray(table, dtype=np.float64)
+            return lambda n: lookup[engine.dice_array(n).sum(axis=1)]
+        return lambda n: [table[a + b] for a, b in engine.dice_batch(n)]
+
+    def coin_round(self, engine, choice):
+        side = COIN_SIDES.index(choice)
+        if engine.use_numpy:
+            return lambda n: np.where(engine.coin_array(n) == side, float(COIN_MULTIPLIER), 0.0)
+        return lambda n: [COIN_MULTIPLIER if flip == side else 0 for flip in engine.coin_batch(n)]
+
+    def mines_round(self, engine, mines, reveals):
+        # The player always opens tiles 0..reveals-1; the layout is uniform,
+        # so which tiles are picked does not matter.
+        picked = mask_from_tiles(range(reveals))
+        payout = float(mines_multiplier(mines, reveals))
+        if engine.use_numpy:
+            return lambda n: np.where(engine.mine_mask_array(n, mines) & picked, 0.0, payout)
+        return lambda n: [0.0 if engine.mine_mask(mines) & picked else payout for _ in range(n)]
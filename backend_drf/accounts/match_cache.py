@@ -0,0 +1,54 @@
+"""
+Cached match list.
+
+The list only changes when an admin edits a match, so the serialized list is
+kept in the Django cache and dropped by the ``Matchess`` save/delete signals
+(``invalidate``), which bump a version stored with the time of the change.
+That version and time are also the list's ETag and Last-Modified, so a
+client that already has the current list gets a 304 without the list being
+read at all.
+"""
+
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+
+STATE_KEY = 'match-list:state'
+LIST_SECONDS = 3600
+
+
+def _new_state():
+    state = {'version': uuid.uuid4().hex[:12], 'updated_at': timezone.now().replace(microsecond=0)}
+    cache.set(STATE_KEY, state, None)
+    return state
+
+
+def get_state():
+    """
+    ``{'version', 'updated_at'}`` of the current match list.
+    """
+    return cache.get(STATE_KEY) or _new_state()
+
+
+def invalidate():
+    _new_state()
+
+
+def etag(state, filters):
+    digest = hashlib.sha1(repr(sorted(filters.items())).encode()).hexdigest()[:8]
+    return f'"{state["version"]}-{digest}"'
+
+
+def get_list(state, filters, build):
+    """
+    The serialized list for ``filters`` at ``state``, built with ``build()``
+    on a miss.
+    """
+    key = f"match-list:{state['version']}:{etag(state, filters)}"
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, LIST_SECONDS)
+    return data
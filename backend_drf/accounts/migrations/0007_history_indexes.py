@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_matchess'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='casinobet',
+            name='user_profile',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='casino_bets', to='accounts.userprofile'),
+        ),
+        migrations.AlterField(
+            model_name='depositrequest',
+            name='user_profile',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='deposit_requests', to='accounts.userprofile'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='user_profile',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='accounts.userprofile'),
+        ),
+        migrations.AlterField(
+            model_name='withdrawalrequest',
+            name='user_profile',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='withdrawal_requests', to='accounts.userprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='casinobet',
+            index=models.Index(fields=['user_profile', '-timestamp', '-id'], name='casinobet_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='depositrequest',
+            index=models.Index(fields=['user_profile', '-timestamp', '-id'], name='deposit_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user_profile', '-timestamp', '-id'], name='transaction_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdrawalrequest',
+            index=models.Index(fields=['user_profile', '-timestamp', '-id'], name='withdrawal_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdrawalrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['user_profile', 'amount'], name='withdrawal_pending_idx'),
+        ),
+    ]
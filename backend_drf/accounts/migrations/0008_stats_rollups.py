@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user_profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='accounts.userprofile')),
+                ('bets', models.PositiveIntegerField(default=0)),
+                ('wagered', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('won', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('deposited', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('withdrawn', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending_withdrawals', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserGameDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_name', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('bets', models.PositiveIntegerField(default=0)),
+                ('wagered', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('won', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('user_profile', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='game_daily_stats', to='accounts.userprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user_profile', 'game_name', 'day'), name='user_game_day_unique')],
+            },
+        ),
+    ]
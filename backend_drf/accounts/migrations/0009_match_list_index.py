@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_stats_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matchess',
+            index=models.Index(fields=['match_status', 'date', 'time'], name='match_status_date_idx'),
+        ),
+    ]
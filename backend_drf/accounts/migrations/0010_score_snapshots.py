@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_match_list_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('is_keyframe', models.BooleanField(default=False)),
+                ('changes', models.JSONField()),
+                ('match', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='score_snapshots', to='accounts.matchess')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['match', 'taken_at'], name='score_snapshot_time_idx')],
+                'constraints': [models.UniqueConstraint(fields=('match', 'seq'), name='score_snapshot_seq_unique')],
+            },
+        ),
+    ]
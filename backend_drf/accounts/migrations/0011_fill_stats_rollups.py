@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def fill_rollups(apps, schema_editor):
+    """
+    0008 created the rollup tables empty; build them from the existing bets,
+    deposits and withdrawals. Replaces whatever was recorded incrementally
+    since 0008, which missed everything before it.
+    """
+    from accounts.stats import rebuild_rollups, write_rollups
+
+    apps.get_model('accounts', 'UserStats').objects.all().delete()
+    apps.get_model('accounts', 'UserGameDailyStats').objects.all().delete()
+    stats, daily = rebuild_rollups(apps=apps)
+    write_rollups(stats, daily, apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_score_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
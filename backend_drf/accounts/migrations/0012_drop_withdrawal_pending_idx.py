@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_fill_stats_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='withdrawalrequest',
+            name='withdrawal_pending_idx',
+        ),
+    ]
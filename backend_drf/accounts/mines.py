@@ -0,0 +1,57 @@
+"""
+Mines payout rules.
+
+``MULTIPLIERS[mines][safe_reveals]`` is the cashout multiplier after
+``safe_reveals`` gems on a board with ``mines`` mines: the inverse of the
+chance of surviving that many reveals, times the 0.95 return, rounded to two
+places (the same numbers the game screen shows). The table is built once at
+import, so a reveal or cashout is a lookup.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+
+from .game_state import GRID_SIZE
+
+RETURN_TO_PLAYER = Fraction(95, 100)
+CENT = Decimal('0.01')
+
+
+def survival(mines, safe_reveals):
+    """
+    Chance that the first ``safe_reveals`` tiles picked are all gems.
+    """
+    chance = Fraction(1)
+    for revealed in range(safe_reveals):
+        chance *= Fraction(GRID_SIZE - mines - revealed, GRID_SIZE - revealed)
+    return chance
+
+
+def _build_multipliers():
+    table = [()]  # no game has 0 mines
+    for mines in range(1, GRID_SIZE):
+        row = [Decimal('1.00')]
+        for revealed in range(1, GRID_SIZE - mines + 1):
+            exact = RETURN_TO_PLAYER / survival(mines, revealed)
+            row.append((Decimal(exact.numerator) / Decimal(exact.denominator)).quantize(CENT, ROUND_HALF_UP))
+        table.append(tuple(row))
+    return tuple(table)
+
+
+MULTIPLIERS = _build_multipliers()
+
+
+def multiplier(mines, safe_reveals):
+    return MULTIPLIERS[mines][safe_reveals]
+
+
+def payout(bet_amount, mines, safe_reveals):
+    return (bet_amount * multiplier(mines, safe_reveals)).quantize(CENT, ROUND_HALF_UP)
+
+
+def rtp(mines, safe_reveals):
+    """
+    Exact expected return per unit staked when always cashing out after
+    ``safe_reveals`` gems.
+    """
+    return float(multiplier(mines, safe_reveals)) * float(survival(mines, safe_reveals))
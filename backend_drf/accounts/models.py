@@ -2,7 +2,8 @@
 
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.db.models import F
 # from django.core.exceptions import ValidationError
@@ -22,12 +23,16 @@ class DepositRequest(models.Model):
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
     ]
-    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='deposit_requests')
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='deposit_requests', db_index=False)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     otp_provided = models.CharField(max_length=10)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # DepositHistoryView: filter by user, newest first.
+        indexes = [models.Index(fields=['user_profile', '-timestamp', '-id'], name='deposit_user_ts_idx')]
+
     def __str__(self):
         return f"Request by {self.user_profile.user.username} for {self.amount} - Status: {self.status}"
 
@@ -37,12 +42,18 @@ class WithdrawalRequest(models.Model):
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
     ]
-    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='withdrawal_requests')
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='withdrawal_requests', db_index=False)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     timestamp = models.DateTimeField(auto_now_add=True)
     otp_provided = models.CharField(max_length=10, default='N/A')
 
+    class Meta:
+        indexes = [
+            # WithdrawalHistoryView: filter by user, newest first.
+            models.Index(fields=['user_profile', '-timestamp', '-id'], name='withdrawal_user_ts_idx'),
+        ]
+
     def __str__(self):
         return f"Withdrawal Request by {self.user_profile.user.username} for {self.amount} - Status: {self.status}"
 
@@ -54,13 +65,17 @@ class Transaction(models.Model):
         ('bet_placed', 'Bet Placed'),
         ('bet_won', 'Bet Won'),
     ]
-    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='transactions')
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='transactions', db_index=False)
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     timestamp = models.DateTimeField(auto_now_add=True)
     deposit_request = models.OneToOneField(DepositRequest, on_delete=models.SET_NULL, null=True, blank=True)
     withdrawal_request = models.OneToOneField(WithdrawalRequest, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        # TransactionHistoryView: filter by user, newest first.
+        indexes = [models.Index(fields=['user_profile', '-timestamp', '-id'], name='transaction_user_ts_idx')]
+
 
 
 
@@ -81,16 +96,61 @@ class Contact(models.Model):
         return f"Query from {self.user.username}"
 
 class CasinoBet(models.Model):
-    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='casino_bets')
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='casino_bets', db_index=False)
     game_name = models.CharField(max_length=50)
     bet_amount = models.DecimalField(max_digits=10, decimal_places=2)
     winnings = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     multiplier = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # CasinoBetsHistoryView: filter by user, newest first.
+        indexes = [models.Index(fields=['user_profile', '-timestamp', '-id'], name='casinobet_user_ts_idx')]
+
     def __str__(self):
         return f"{self.game_name} bet by {self.user_profile.user.username}"
 
+# --- STATS ROLLUPS ---
+# Maintained incrementally by accounts.stats in the same transaction as the
+# bet or money movement; `manage.py reconcile_stats` rebuilds them.
+
+class UserStats(models.Model):
+    user_profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    bets = models.PositiveIntegerField(default=0)
+    wagered = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    won = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    deposited = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    withdrawn = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Sum of pending withdrawal requests (what UserExposureView reports).
+    pending_withdrawals = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    @property
+    def net(self):
+        return self.won - self.wagered
+
+    def __str__(self):
+        return f"Stats for {self.user_profile}"
+
+class UserGameDailyStats(models.Model):
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='game_daily_stats', db_index=False)
+    game_name = models.CharField(max_length=50)
+    day = models.DateField()
+    bets = models.PositiveIntegerField(default=0)
+    wagered = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    won = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_profile', 'game_name', 'day'], name='user_game_day_unique'),
+        ]
+
+    @property
+    def net(self):
+        return self.won - self.wagered
+
+    def __str__(self):
+        return f"{self.game_name} on {self.day} for {self.user_profile}"
+
 # --- AUTOMATION SIGNALS ---
 
 @receiver(post_save, sender=User)
@@ -99,6 +159,21 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
     instance.profile.save()
 
+@receiver(post_save, sender=User)
+def on_user_saved(sender, instance, created, **kwargs):
+    # Token authentication caches the active flag; a deactivated user's
+    # tokens stop working at once instead of when the cache entry expires.
+    from .authentication import revoke_user_tokens, set_active_flag
+    set_active_flag(instance.pk, instance.is_active)
+    if not instance.is_active:
+        revoke_user_tokens(instance.pk)
+
+@receiver(post_save, sender=UserProfile)
+def on_user_profile_saved(sender, instance, **kwargs):
+    # Every save may change the balance (Mines, deposits, withdrawals, admin).
+    from .balance_cache import balance_changed
+    balance_changed(instance.user_id, instance.balance)
+
 @receiver(post_save, sender=DepositRequest)
 def on_deposit_request_approved(sender, instance, created, **kwargs):
     if not created and instance.status == 'approved':
@@ -112,6 +187,8 @@ def on_deposit_request_approved(sender, instance, created, **kwargs):
                 amount=instance.amount,
                 deposit_request=instance
             )
+            from .stats import record_deposit
+            record_deposit(instance.user_profile_id, instance.amount)
 
 @receiver(pre_save, sender=WithdrawalRequest)
 def on_withdrawal_request_rejection(sender, instance, **kwargs):
@@ -120,6 +197,9 @@ def on_withdrawal_request_rejection(sender, instance, **kwargs):
             original_instance = WithdrawalRequest.objects.get(pk=instance.pk)
         except WithdrawalRequest.DoesNotExist:
             return
+        if original_instance.status == 'pending' and instance.status != 'pending':
+            from .stats import record_withdrawal_settled
+            record_withdrawal_settled(instance.user_profile_id, original_instance.amount, instance.status == 'approved')
         if original_instance.status == 'pending' and instance.status == 'rejected':
             profile = instance.user_profile
             profile.balance = F('balance') + instance.amount
@@ -132,6 +212,9 @@ def on_withdrawal_request_rejection(sender, instance, **kwargs):
 
 @receiver(post_save, sender=WithdrawalRequest)
 def on_withdrawal_request_approved(sender, instance, created, **kwargs):
+    if created and instance.status == 'pending':
+        from .stats import record_withdrawal_requested
+        record_withdrawal_requested(instance.user_profile_id, instance.amount)
     if not created and instance.status == 'approved':
         if not Transaction.objects.filter(withdrawal_request=instance).exists():
             Transaction.objects.create(
@@ -145,23 +228,15 @@ def on_withdrawal_request_approved(sender, instance, created, **kwargs):
 @receiver(post_save, sender=CasinoBet)
 def create_casino_transactions(sender, instance, created, **kwargs):
     """
-    This signal automatically creates transaction records every time a new
-    CasinoBet is saved.
+    Write the ledger rows and rollups for a CasinoBet saved one at a time
+    (admin, Mines). Bets written through accounts.ledger.record_casino_bets
+    use bulk_create, which skips this signal, and get both there instead.
     """
     if created:
-        # 1. Create the 'bet_placed' transaction
-        Transaction.objects.create(
-            user_profile=instance.user_profile,
-            transaction_type='bet_placed',
-            amount=instance.bet_amount
-        )
-        # 2. If there were winnings, create the 'bet_won' transaction
-        if instance.winnings > 0:
-            Transaction.objects.create(
-                user_profile=instance.user_profile,
-                transaction_type='bet_won',
-                amount=instance.winnings
-            )
+        from .ledger import write_bet_ledger
+        from .stats import record_bets
+        write_bet_ledger([instance])
+        record_bets([instance])
 class Matchess(models.Model):
     match_id = models.IntegerField(unique=True)
     match_name = models.CharField(max_length=100)
@@ -176,7 +251,50 @@ class Matchess(models.Model):
     img = models.ImageField(upload_to='images/')
     url = models.URLField()
 
+    class Meta:
+        indexes = [
+            # MatchListView: ?status= and date range, in (date, time) order.
+            models.Index(fields=['match_status', 'date', 'time'], name='match_status_date_idx'),
+        ]
+
     def __str__(self):
         return self.match_name
+
+@receiver(post_save, sender=Matchess)
+@receiver(post_delete, sender=Matchess)
+def on_match_changed(sender, instance, **kwargs):
+    # After commit, so a list rebuilt in between cannot cache the old rows
+    # under the new version.
+    from .match_cache import invalidate
+    transaction.on_commit(invalidate)
     
    
+
+# --- SCORE HISTORY ---
+# Appended by accounts.score_history from the ingest_scores worker.
+
+class ScoreSnapshot(models.Model):
+    """
+    One change to a match's live score. ``seq`` counts up from 1 per match
+    and is the cursor clients resume from. Keyframes store the whole score
+    dict; other rows store only the fields that changed since the previous
+    row (None for a field that went away).
+    """
+    match = models.ForeignKey(Matchess, on_delete=models.CASCADE, related_name='score_snapshots', db_index=False)
+    seq = models.PositiveIntegerField()
+    taken_at = models.DateTimeField()
+    is_keyframe = models.BooleanField(default=False)
+    changes = models.JSONField()
+
+    class Meta:
+        constraints = [
+            # Also the index for "changes since cursor" and keyframe lookups.
+            models.UniqueConstraint(fields=['match', 'seq'], name='score_snapshot_seq_unique'),
+        ]
+        indexes = [
+            # "State at time T".
+            models.Index(fields=['match', 'taken_at'], name='score_snapshot_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.match} #{self.seq}"
@@ -0,0 +1,124 @@
+"""
+Keyset (cursor) pagination and streamed exports for the history endpoints.
+
+History lists are ordered newest first on ``(timestamp, id)``, which the
+``*_user_ts_idx`` indexes serve directly. A page is read with ``.values()``
+so no model instances are built, and the cursor is the ``(timestamp, id)``
+of the last row, so later pages cost the same as the first.
+"""
+
+import base64
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(row):
+    raw = f"{row['timestamp'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        timestamp = parse_datetime(timestamp)
+        if timestamp is None:
+            raise ValueError
+        return timestamp, int(pk)
+    except ValueError as e:
+        raise InvalidPageRequest("Invalid cursor.") from e
+
+
+def _page_size(request):
+    try:
+        size = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError as e:
+        raise InvalidPageRequest("limit must be a number.") from e
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _after_cursor(queryset, cursor):
+    timestamp, pk = decode_cursor(cursor)
+    # Same as (timestamp, id) < (cursor), written so the index range scan
+    # can start at the cursor's timestamp.
+    return queryset.filter(timestamp__lte=timestamp).exclude(timestamp=timestamp, id__gte=pk)
+
+
+def keyset_page(request, queryset, fields):
+    """
+    One page of ``queryset`` as dicts of ``fields`` (plus ``id`` and
+    ``timestamp``), newest first. Returns ``(rows, next_cursor)``;
+    ``next_cursor`` is None on the last page.
+    """
+    limit = _page_size(request)
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        queryset = _after_cursor(queryset, cursor)
+    rows = list(
+        queryset.order_by('-timestamp', '-id').values('id', 'timestamp', *fields)[:limit + 1]
+    )
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def _export_lines(queryset, fields, to_item, export_format):
+    rows = queryset.order_by('-timestamp', '-id').values('id', 'timestamp', *fields)
+    rows = rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if export_format == 'ndjson':
+        for row in rows:
+            yield json.dumps(to_item(row), cls=JSONEncoder) + '\n'
+        return
+
+    class _Line:
+        def write(self, value):
+            return value
+
+    writer = csv.writer(_Line())
+    header = None
+    for row in rows:
+        item = to_item(row)
+        if header is None:
+            header = list(item)
+            yield writer.writerow(header)
+        yield writer.writerow([item[key] for key in header])
+
+
+def history_response(request, queryset, fields, to_item, export_name):
+    """
+    Response for a history endpoint.
+
+    ``?cursor=`` and ``?limit=`` (max MAX_PAGE_SIZE) page through the list;
+    the body is ``{"results": [...], "next_cursor": ...}``. ``?export=ndjson``
+    or ``?export=csv`` instead streams every row in constant memory.
+    ``to_item`` turns a ``.values()`` dict into the JSON item.
+    """
+    export_format = request.query_params.get('export')
+    try:
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                raise InvalidPageRequest(f"export must be one of: {', '.join(EXPORT_FORMATS)}.")
+            response = StreamingHttpResponse(
+                _export_lines(queryset, fields, to_item, export_format),
+                content_type='application/x-ndjson' if export_format == 'ndjson' else 'text/csv',
+            )
+            response['Content-Disposition'] = f'attachment; filename="{export_name}.{export_format}"'
+            return response
+
+        rows, next_cursor = keyset_page(request, queryset, fields)
+    except InvalidPageRequest as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'results': [to_item(row) for row in rows], 'next_cursor': next_cursor})
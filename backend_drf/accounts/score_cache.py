@@ -0,0 +1,366 @@
+"""
+Shared, TTL-bounded cache in front of the live score scraper.
+
+Score endpoints go through ``get_live_score_cached`` (scrape on miss) or
+``get_snapshot`` (read only, filled by the ``ingest_scores`` worker), or
+their async counterparts ``aget_live_score_cached`` and ``aget_snapshot``, so the
+scorecard site is scraped once per match per freshness window, no matter how
+many clients are polling. Entries live in the Django cache (see ``CACHES``
+in settings) so all worker processes share them.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from . import async_scraper
+from .scraper import HOST_UNAVAILABLE, fetch_live_score
+
+_DEFAULTS = {
+    'ALIAS': 'default',
+    # Seconds a scraped score is served without re-checking upstream.
+    'FRESH_SECONDS': 5,
+    # Seconds a score may still be served (while a refresh runs) after it
+    # stops being fresh. Entries are evicted from the cache after this.
+    'STALE_SECONDS': 120,
+    # Upper bound on how long one fetch may hold the refresh lock.
+    'LOCK_SECONDS': 15,
+}
+
+
+def config(name):
+    return getattr(settings, 'LIVE_SCORE_CACHE', {}).get(name, _DEFAULTS[name])
+
+
+def _cache():
+    return caches[config('ALIAS')]
+
+
+def cache_key(url, team_1=None, team_2=None):
+    """
+    Cache key for a scorecard URL. Team overrides change the scraped dict,
+    so they are part of the key.
+    """
+    digest = hashlib.sha1(f"{url}|{team_1 or ''}|{team_2 or ''}".encode()).hexdigest()
+    return f"live-score:{digest}"
+
+
+class ScoreCacheStats:
+    """
+    Process-local hit/miss/latency counters for the score cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'fetches': 0, 'fetch_errors': 0}
+            self._fetch_seconds_total = 0.0
+            self._fetch_seconds_max = 0.0
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def observe_fetch(self, seconds, failed):
+        with self._lock:
+            self._counts['fetches'] += 1
+            if failed:
+                self._counts['fetch_errors'] += 1
+            self._fetch_seconds_total += seconds
+            self._fetch_seconds_max = max(self._fetch_seconds_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self._counts)
+            lookups = data['hits'] + data['stale_hits'] + data['misses']
+            data['hit_ratio'] = round((data['hits'] + data['stale_hits']) / lookups, 4) if lookups else 0.0
+            fetches = data['fetches']
+            data['fetch_ms_avg'] = round(self._fetch_seconds_total * 1000 / fetches, 2) if fetches else 0.0
+            data['fetch_ms_max'] = round(self._fetch_seconds_max * 1000, 2)
+            return data
+
+
+stats = ScoreCacheStats()
+
+# Keys with a fetch in progress in this process, so concurrent misses wait
+# for the one fetch instead of each scraping the page.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _store(key, entry):
+    _cache().set(key, entry, timeout=config('STALE_SECONDS'))
+
+
+def _next_entry(previous, data, changed):
+    now = time.time()
+    if previous:
+        stale = previous['data'].get('stale', False)
+        if 'error' in data and 'error' not in previous['data']:
+            if stale:
+                return dict(previous, checked_at=now)
+            # A copy: the stored dict may be the scraper's shared page state.
+            return dict(previous, data=dict(previous['data'], stale=True),
+                        version=previous['version'] + 1, checked_at=now)
+        if (not changed and not stale) or data == previous['data']:
+            return dict(previous, checked_at=now)
+    version = previous['version'] + 1 if previous else 1
+    return {'data': data, 'version': version, 'fetched_at': now, 'checked_at': now}
+
+
+def publish(url, data, team_1=None, team_2=None, changed=True):
+    """
+    Store a freshly scraped score dict as the current snapshot for ``url``.
+    ``version`` only moves when the score actually changed, so consumers can
+    tell a new ball from a re-check. A failed scrape (or one skipped by
+    ``scrape_guard`` while the source is down) keeps serving the last good
+    score, flagged ``"stale": true``, instead of replacing it with an error;
+    the flag goes away with the next good scrape. Scrapes skipped by the
+    rate limit are not published at all.
+    """
+    key = cache_key(url, team_1, team_2)
+    entry = _next_entry(_cache().get(key), data, changed)
+    _store(key, entry)
+    return entry
+
+
+async def apublish(url, data, team_1=None, team_2=None, changed=True):
+    key = cache_key(url, team_1, team_2)
+    entry = _next_entry(await _cache().aget(key), data, changed)
+    await _cache().aset(key, entry, timeout=config('STALE_SECONDS'))
+    return entry
+
+
+def get_snapshot(url, team_1=None, team_2=None):
+    """
+    Return the stored score dict for ``url`` without ever scraping, or None
+    when nothing has been published (or it has aged out).
+    """
+    entry = _cache().get(cache_key(url, team_1, team_2))
+    if entry is None:
+        stats.incr('misses')
+        return None
+    stats.incr('hits')
+    return entry['data']
+
+
+async def aget_snapshot(url, team_1=None, team_2=None):
+    entry = await _cache().aget(cache_key(url, team_1, team_2))
+    if entry is None:
+        stats.incr('misses')
+        return None
+    stats.incr('hits')
+    return entry['data']
+
+
+def get_snapshots(targets):
+    """
+    Batch ``get_snapshot``: ``targets`` is a list of ``(url, team_1,
+    team_2)`` tuples, answered with one cache round-trip. Returns the stored
+    dicts (or None) in the same order.
+    """
+    keys = [cache_key(*target) for target in targets]
+    entries = _cache().get_many(keys)
+    results = []
+    for key in keys:
+        entry = entries.get(key)
+        stats.incr('hits' if entry is not None else 'misses')
+        results.append(entry['data'] if entry is not None else None)
+    return results
+
+
+async def aget_entry(key):
+    """
+    The raw stored entry (``data``, ``version``, ``fetched_at``,
+    ``checked_at``) for a cache key, for async callers.
+    """
+    return await _cache().aget(key)
+
+
+def _fetch(url, team_1, team_2):
+    started = time.monotonic()
+    result = fetch_live_score(url, team_1, team_2)
+    if result.throttled:
+        # No request was sent and nothing is wrong upstream: keep the entry.
+        return _cache().get(cache_key(url, team_1, team_2))
+    if result.data != HOST_UNAVAILABLE:
+        stats.observe_fetch(time.monotonic() - started, 'error' in result.data)
+    return publish(url, result.data, team_1, team_2, changed=result.changed)
+
+
+def _wait_for_peer(key, since):
+    """
+    Another process holds the refresh lock; poll until it publishes a newer
+    entry or the lock goes away.
+    """
+    cache = _cache()
+    deadline = time.monotonic() + config('LOCK_SECONDS')
+    while time.monotonic() < deadline:
+        entry = cache.get(key)
+        if entry and entry['checked_at'] >= since:
+            return entry
+        if cache.get(f"{key}:lock") is None:
+            return entry
+        time.sleep(0.1)
+    return cache.get(key)
+
+
+def _refresh(key, url, team_1, team_2):
+    """
+    Single-flight refresh: only one caller per key (per process, and per
+    cache via a lock key) scrapes; everyone else waits for its result.
+    """
+    with _inflight_lock:
+        event = _inflight.get(key)
+        leader = event is None
+        if leader:
+            event = _inflight[key] = threading.Event()
+
+    if not leader:
+        event.wait(config('LOCK_SECONDS'))
+        return _cache().get(key)
+
+    try:
+        cache = _cache()
+        lock_key = f"{key}:lock"
+        if not cache.add(lock_key, 1, timeout=config('LOCK_SECONDS')):
+            return _wait_for_peer(key, time.time())
+        try:
+            return _fetch(url, team_1, team_2)
+        finally:
+            cache.delete(lock_key)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        event.set()
+
+
+def _revalidate_in_background(key, url, team_1, team_2):
+    with _inflight_lock:
+        if key in _inflight:
+            return
+    threading.Thread(target=_refresh, args=(key, url, team_1, team_2), daemon=True).start()
+
+
+def get_live_score_cached(url, team_1=None, team_2=None):
+    """
+    Return the live score dict for ``url`` (same shape as ``get_live_score``).
+
+    Fresh entries are served straight from the cache. Stale entries are
+    served immediately while one background refresh runs. A miss blocks on
+    a single shared fetch.
+    """
+    key = cache_key(url, team_1, team_2)
+    entry = _cache().get(key)
+    if entry is not None:
+        if time.time() - entry['checked_at'] < config('FRESH_SECONDS'):
+            stats.incr('hits')
+        else:
+            stats.incr('stale_hits')
+            _revalidate_in_background(key, url, team_1, team_2)
+        return entry['data']
+
+    stats.incr('misses')
+    entry = _refresh(key, url, team_1, team_2)
+    if entry is None:
+        return {"error": "Unable to fetch data"}
+    return entry['data']
+
+
+# --- Async (ASGI) path ---
+#
+# Same protocol as above, but a miss awaits the fetch on the event loop
+# instead of holding a thread. Refreshes are tasks shared per event loop,
+# keyed like ``_inflight``; the cache lock still keeps other processes (and
+# this process's sync path) from scraping the same page at the same time.
+# Under WSGI each async view gets a loop from ``async_to_sync`` that closes
+# with the request and would cancel those tasks, so there the refresh runs
+# the sync way instead.
+
+_tasks = {}
+
+
+async def _afetch(url, team_1, team_2):
+    started = time.monotonic()
+    result = await async_scraper.fetch_live_score(await async_scraper.shared_client(), url, team_1, team_2)
+    if result.throttled:
+        return await _cache().aget(cache_key(url, team_1, team_2))
+    if result.data != HOST_UNAVAILABLE:
+        stats.observe_fetch(time.monotonic() - started, 'error' in result.data)
+    return await apublish(url, result.data, team_1, team_2, changed=result.changed)
+
+
+async def _await_peer(key, since):
+    cache = _cache()
+    deadline = time.monotonic() + config('LOCK_SECONDS')
+    while time.monotonic() < deadline:
+        entry = await cache.aget(key)
+        if entry and entry['checked_at'] >= since:
+            return entry
+        if await cache.aget(f"{key}:lock") is None:
+            return entry
+        await asyncio.sleep(0.1)
+    return await cache.aget(key)
+
+
+async def _arefresh(key, url, team_1, team_2):
+    cache = _cache()
+    lock_key = f"{key}:lock"
+    if not await cache.aadd(lock_key, 1, timeout=config('LOCK_SECONDS')):
+        return await _await_peer(key, time.time())
+    try:
+        return await _afetch(url, team_1, team_2)
+    finally:
+        await cache.adelete(lock_key)
+
+
+def _refresh_task(key, url, team_1, team_2):
+    """
+    The running refresh of ``key`` on this event loop, started if needed.
+    """
+    loop = asyncio.get_running_loop()
+    task_key = (loop, key)
+    task = _tasks.get(task_key)
+    if task is None:
+        task = _tasks[task_key] = loop.create_task(_arefresh(key, url, team_1, team_2))
+        task.add_done_callback(lambda _: _tasks.pop(task_key, None))
+    return task
+
+
+async def aget_live_score_cached(url, team_1=None, team_2=None, long_lived_loop=True):
+    """
+    Async ``get_live_score_cached``. Pass ``long_lived_loop=False`` when the
+    running event loop closes with the request (WSGI); refreshes then run
+    on a thread with the sync scraper, as in ``get_live_score_cached``.
+    """
+    key = cache_key(url, team_1, team_2)
+    entry = await _cache().aget(key)
+    if entry is not None:
+        if time.time() - entry['checked_at'] < config('FRESH_SECONDS'):
+            stats.incr('hits')
+        else:
+            stats.incr('stale_hits')
+            if long_lived_loop:
+                _refresh_task(key, url, team_1, team_2)
+            else:
+                _revalidate_in_background(key, url, team_1, team_2)
+        return entry['data']
+
+    stats.incr('misses')
+    if long_lived_loop:
+        # Shielded: a client that disconnects must not cancel the fetch that
+        # other requests are waiting on.
+        entry = await asyncio.shield(_refresh_task(key, url, team_1, team_2))
+    else:
+        entry = await sync_to_async(_refresh, thread_sensitive=False)(key, url, team_1, team_2)
+    if entry is None:
+        return {"error": "Unable to fetch data"}
+    return entry['data']
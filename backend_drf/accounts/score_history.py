@@ -0,0 +1,132 @@
+"""
+Per-match score history.
+
+``record`` appends a ``ScoreSnapshot`` each time the ingested score of a
+match changes. Most rows hold just the changed fields (a new ball usually
+touches ``score``, ``over`` and the batsmen); every ``KEYFRAME_EVERY``-th
+row holds the full dict, so rebuilding the score at any time reads at most
+one keyframe plus ``KEYFRAME_EVERY - 1`` diffs.
+
+``state_at`` answers "what was the score at time T" (replays, disputes) and
+``changes_since`` returns the rows after a cursor, so clients that already
+have the score only download what changed.
+"""
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ScoreSnapshot
+
+KEYFRAME_EVERY = 50
+# Fields of the score dict that describe the fetch, not the match.
+IGNORED_FIELDS = ('stale',)
+LAST_STATE_SECONDS = 6 * 3600
+
+
+def _last_key(match_id):
+    return f"score-history:{match_id}"
+
+
+def _score(data):
+    return {field: value for field, value in data.items() if field not in IGNORED_FIELDS}
+
+
+def diff(old, new):
+    changes = {field: value for field, value in new.items() if old.get(field) != value}
+    changes.update({field: None for field in old if field not in new})
+    return changes
+
+
+def apply(state, changes):
+    state = dict(state)
+    for field, value in changes.items():
+        if value is None:
+            state.pop(field, None)
+        else:
+            state[field] = value
+    return state
+
+
+def _rebuild(rows):
+    """
+    Score dict from rows in ``seq`` order, the first being a keyframe.
+    """
+    state = {}
+    for row in rows:
+        state = dict(row['changes']) if row['is_keyframe'] else apply(state, row['changes'])
+    return state
+
+
+def _state_until(match_id, **filters):
+    """
+    ``(seq, taken_at, score)`` of the last row matching ``filters``, or None.
+    """
+    rows = ScoreSnapshot.objects.filter(match_id=match_id, **filters)
+    keyframe = rows.filter(is_keyframe=True).order_by('-seq').values_list('seq', flat=True).first()
+    if keyframe is None:
+        return None
+    rows = list(
+        rows.filter(seq__gte=keyframe).order_by('seq').values('seq', 'taken_at', 'is_keyframe', 'changes')
+    )
+    return rows[-1]['seq'], rows[-1]['taken_at'], _rebuild(rows)
+
+
+def state_at(match_id, when):
+    """
+    ``{'seq', 'taken_at', 'score'}`` of the score the match had at ``when``,
+    or None if nothing had been recorded by then.
+    """
+    state = _state_until(match_id, taken_at__lte=when)
+    if state is None:
+        return None
+    seq, taken_at, score = state
+    return {'seq': seq, 'taken_at': taken_at, 'score': score}
+
+
+def changes_since(match_id, cursor=0, limit=50):
+    """
+    Up to ``limit`` rows after ``cursor`` (a ``seq``; 0 for the beginning,
+    which is a keyframe) as ``{'seq', 'taken_at', 'keyframe', 'changes'}``.
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is the cursor to pass
+    next time, equal to ``cursor`` when nothing has changed.
+    """
+    rows = ScoreSnapshot.objects.filter(match_id=match_id, seq__gt=cursor).order_by('seq')
+    rows = [
+        {'seq': row['seq'], 'taken_at': row['taken_at'], 'keyframe': row['is_keyframe'], 'changes': row['changes']}
+        for row in rows.values('seq', 'taken_at', 'is_keyframe', 'changes')[:limit]
+    ]
+    return rows, rows[-1]['seq'] if rows else cursor
+
+
+def record(match_id, data):
+    """
+    Append the match's scraped score dict if it differs from the last one
+    recorded. Error dicts are not scores and are skipped. Returns the new
+    ``ScoreSnapshot`` or None.
+    """
+    if 'error' in data:
+        return None
+    score = _score(data)
+    last = cache.get(_last_key(match_id))
+    if last is None:
+        state = _state_until(match_id)
+        last = (state[0], state[2]) if state else (0, {})
+    seq, previous = last
+    if seq and score == previous:
+        return None
+
+    seq += 1
+    keyframe = (seq - 1) % KEYFRAME_EVERY == 0
+    try:
+        with transaction.atomic():
+            snapshot = ScoreSnapshot.objects.create(
+                match_id=match_id, seq=seq, taken_at=timezone.now(), is_keyframe=keyframe,
+                changes=score if keyframe else diff(previous, score),
+            )
+    except IntegrityError:
+        # Another writer got there first; re-read the history next time.
+        cache.delete(_last_key(match_id))
+        return None
+    cache.set(_last_key(match_id), (seq, score), LAST_STATE_SECONDS)
+    return snapshot
@@ -0,0 +1,95 @@
+"""
+Fan-out of live score snapshots to streaming (Server-Sent Events) clients.
+
+Each process watches the shared score store once per match, however many
+viewers are connected, and hands every new snapshot to all of them.
+"""
+
+import asyncio
+import contextlib
+import weakref
+
+from . import score_cache
+
+# How often a watched match's snapshot is re-read from the score store.
+POLL_SECONDS = 1.0
+
+_UNSET = object()
+
+
+def _identity(entry):
+    # version restarts at 1 if an entry ages out and is published again, so
+    # fetched_at is part of what makes a snapshot new.
+    return None if entry is None else (entry['version'], entry['fetched_at'])
+
+
+def _offer(queue, entry):
+    """
+    Give a subscriber the newest snapshot, dropping one it has not read yet.
+    """
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(entry)
+
+
+class _Hub:
+    def __init__(self):
+        self.subscribers = set()
+        self.entry = _UNSET
+        self.task = None
+
+
+class ScoreBroadcaster:
+    """
+    Per-event-loop registry of watched matches.
+    """
+
+    def __init__(self):
+        self._hubs = {}
+
+    @contextlib.asynccontextmanager
+    async def subscription(self, url, team_1=None, team_2=None):
+        """
+        Yield a queue that receives the match's current snapshot entry (or
+        None when nothing is published yet) and then every changed one.
+        """
+        key = score_cache.cache_key(url, team_1, team_2)
+        hub = self._hubs.get(key)
+        if hub is None:
+            hub = self._hubs[key] = _Hub()
+            hub.task = asyncio.create_task(self._watch(key, hub))
+
+        queue = asyncio.Queue(maxsize=1)
+        hub.subscribers.add(queue)
+        if hub.entry is not _UNSET:
+            queue.put_nowait(hub.entry)
+        try:
+            yield queue
+        finally:
+            hub.subscribers.discard(queue)
+            if not hub.subscribers:
+                hub.task.cancel()
+                self._hubs.pop(key, None)
+
+    async def _watch(self, key, hub):
+        while True:
+            entry = await score_cache.aget_entry(key)
+            if hub.entry is _UNSET or _identity(entry) != _identity(hub.entry):
+                hub.entry = entry
+                for queue in hub.subscribers:
+                    _offer(queue, entry)
+            await asyncio.sleep(POLL_SECONDS)
+
+
+_broadcasters = weakref.WeakKeyDictionary()
+
+
+def get_broadcaster():
+    """
+    The broadcaster for the running event loop (one per process under ASGI).
+    """
+    loop = asyncio.get_running_loop()
+    broadcaster = _broadcasters.get(loop)
+    if broadcaster is None:
+        broadcaster = _broadcasters[loop] = ScoreBroadcaster()
+    return broadcaster
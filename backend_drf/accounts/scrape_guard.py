@@ -0,0 +1,179 @@
+"""
+Per-host circuit breaker and rate limiter for the scorecard scraper.
+
+Every outbound scrape (``scraper.fetch_live_score`` and its async twin) first
+asks the host's ``HostGuard``:
+
+* The circuit breaker opens after ``FAILURE_THRESHOLD`` consecutive failures
+  (network errors, timeouts, 5xx, 429). While open, scrapes of that host fail
+  immediately instead of waiting out ``REQUEST_TIMEOUT``, and the score cache
+  keeps serving the last good score flagged ``stale``. When the open period
+  ends one probe request is let through; success closes the breaker, failure
+  opens it again for twice as long (jittered, capped at ``MAX_OPEN_SECONDS``).
+* A token bucket caps requests per second to the host, so many matches on
+  one site or a burst of cache misses cannot get us rate limited or banned.
+  A scrape without a token is skipped, not queued, and reported as
+  throttled: the host is fine, so callers keep what they have.
+
+State is per process.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+FAILURE_THRESHOLD = 5
+BASE_OPEN_SECONDS = 5.0
+MAX_OPEN_SECONDS = 300.0
+# A probe that never reports back (its task was cancelled) stops blocking
+# the next probe after this long.
+PROBE_SECONDS = 15.0
+
+RATE_PER_SECOND = 5.0
+BURST = 10
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# What ``HostGuard.acquire`` answers.
+ALLOWED = 'allowed'
+UNAVAILABLE = 'unavailable'
+THROTTLED = 'throttled'
+
+
+def open_seconds(trips):
+    """
+    How long the breaker stays open after its ``trips``-th consecutive trip:
+    exponential, capped, with jitter so processes do not probe in step.
+    """
+    ceiling = min(MAX_OPEN_SECONDS, BASE_OPEN_SECONDS * 2 ** (trips - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def retry_after_seconds(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_host_failure(status_code):
+    """
+    Responses that say the host (not the page) is in trouble.
+    """
+    return status_code == 429 or status_code >= 500
+
+
+class TokenBucket:
+
+    def __init__(self, rate=RATE_PER_SECOND, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class HostGuard:
+    """
+    Circuit breaker plus token bucket for one host.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.bucket = TokenBucket()
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probe_started = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        ``ALLOWED`` if a request may be sent now, ``UNAVAILABLE`` while the
+        breaker keeps the host shut, ``THROTTLED`` when only the rate limit
+        is in the way. A caller that gets ``ALLOWED`` must report the
+        outcome with ``record_success``/``record_failure``.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now < self.open_until:
+                    return UNAVAILABLE
+                self.state = HALF_OPEN
+                self.probe_started = None
+            if self.state == HALF_OPEN and self.probe_started is not None:
+                if now - self.probe_started < PROBE_SECONDS:
+                    return UNAVAILABLE
+            if not self.bucket.take(now):
+                return THROTTLED
+            if self.state == HALF_OPEN:
+                self.probe_started = now
+            return ALLOWED
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.trips = 0
+            self.probe_started = None
+
+    def record_failure(self, retry_after=None):
+        with self._lock:
+            self.failures += 1
+            if self.state != HALF_OPEN and self.failures < FAILURE_THRESHOLD and retry_after is None:
+                return
+            self.trips += 1
+            seconds = open_seconds(self.trips)
+            if retry_after is not None:
+                seconds = max(seconds, retry_after)
+            self.state = OPEN
+            self.open_until = time.monotonic() + seconds
+            self.probe_started = None
+
+    def record_response(self, status_code, retry_after=None):
+        if is_host_failure(status_code):
+            self.record_failure(retry_after_seconds(retry_after) if status_code == 429 else None)
+        else:
+            self.record_success()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'open_for': round(max(0.0, self.open_until - time.monotonic()), 1) if self.state == OPEN else 0.0,
+            }
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def guard_for(url):
+    host = urlsplit(url).netloc.lower()
+    with _guards_lock:
+        guard = _guards.get(host)
+        if guard is None:
+            guard = _guards[host] = HostGuard(host)
+        return guard
+
+
+def snapshot():
+    """
+    ``{host: {'state', 'failures', 'open_for'}}`` for every host scraped by
+    this process.
+    """
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.host: guard.snapshot() for guard in guards}
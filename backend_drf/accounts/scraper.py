@@ -1,5 +1,28 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from .scrape_guard import ALLOWED, THROTTLED, guard_for
+
+REQUEST_TIMEOUT = 10
+
+FETCH_ERROR = {"error": "Unable to fetch data"}
+# Returned without a request while the host's breaker is open.
+HOST_UNAVAILABLE = {"error": "Score source unavailable"}
+# Returned without a request when this process is over the host's rate
+# limit; the page is fine, so caches keep what they hold.
+RATE_LIMITED = {"error": "Score source rate limit reached"}
+
+# One keep-alive connection pool shared by every call, so repeated scrapes
+# of the same host skip the TCP+TLS handshake.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+_session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
 
 
 def safe_get_text(soup, selector, index=0, attr="text", default="", join_strings=False):
@@ -24,56 +47,192 @@ def safe_get_text(soup, selector, index=0, attr="text", default="", join_strings
         return default
 
 
-def get_live_score(url, team_1=None, team_2=None):
+class ScoreFetch(NamedTuple):
     """
-    Fetch live cricket score details from given URL.
+    A scraped score plus whether it differs from the previous scrape of the
+    same page, so consumers can skip re-serializing and pushing it.
+    ``seconds`` is how long the request took (0 if none was sent).
+    ``throttled`` means no request was sent because of the rate limit;
+    ``data`` is then ``RATE_LIMITED`` and should not replace a cached score.
     """
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-    except Exception:
-        return {"error": "Unable to fetch data"}
+    data: dict
+    changed: bool
+    seconds: float = 0.0
+    throttled: bool = False
 
-    soup = BeautifulSoup(response.text, 'html.parser')
 
-    match_name = safe_get_text(soup, ('h1', 'name-wrapper'))
+def skipped_fetch(verdict):
+    """
+    The ScoreFetch for a scrape ``scrape_guard`` did not allow.
+    """
+    if verdict == THROTTLED:
+        return ScoreFetch(dict(RATE_LIMITED), False, throttled=True)
+    return ScoreFetch(dict(HOST_UNAVAILABLE), True)
 
-    # Score + Over
-    score, over = "", ""
-    a = soup.find('div', class_='runs f-runs')
-    if a:
-        spans = a.find_all("span")
-        if len(spans) >= 2:
-            score = spans[0].get_text(strip=True)
-            over = spans[1].get_text(strip=True)
 
-    # Team details
-    team1 = team_1 or safe_get_text(soup, ('div', 'teamNameScreenText'), 0)
-    team2 = team_2 or safe_get_text(soup, ('div', 'teamNameScreenText'), 1)
+class _PageState(NamedTuple):
+    etag: str
+    last_modified: str
+    body_hash: str
+    data: dict
 
-    crr = safe_get_text(soup, ('span', 'title'))
-    main_message = safe_get_text(soup, ('div', 'result-box'))
 
-    # Extra info
-    extra_message = safe_get_text(soup, ('div', 'final-result m-none'), 0, join_strings=True)
-    extra_message1 = safe_get_text(soup, ('div', 'final-result comment m-none'), 0, join_strings=True)
+# Validators and last parse per (url, team_1, team_2), least recently used
+# first. Bounded because LiveScoreAPIView accepts arbitrary URLs.
+_page_states = OrderedDict()
+_page_states_lock = threading.Lock()
+MAX_PAGE_STATES = 256
 
-    # Players
-    batsman_1 = safe_get_text(soup, ('div', 'batsmen-name'), 0)
-    batsman_1_score = safe_get_text(soup, ('div', 'batsmen-score'), 0)
-    batsman_2 = safe_get_text(soup, ('div', 'batsmen-name'), 1)
-    batsman_2_score = safe_get_text(soup, ('div', 'batsmen-score'), 1)
-    bowler = safe_get_text(soup, ('div', 'bowler-name'), 0)
-    bowler_score = safe_get_text(soup, ('div', 'bowler-figures'), 0)
 
-    # Percentages
-    team1_perc, team2_perc = "0", "0"
+def _get_page_state(key):
+    with _page_states_lock:
+        state = _page_states.get(key)
+        if state is not None:
+            _page_states.move_to_end(key)
+        return state
+
+
+def _set_page_state(key, state):
+    with _page_states_lock:
+        _page_states[key] = state
+        _page_states.move_to_end(key)
+        while len(_page_states) > MAX_PAGE_STATES:
+            _page_states.popitem(last=False)
+
+
+def conditional_headers(url, team_1=None, team_2=None):
+    """
+    ``If-None-Match``/``If-Modified-Since`` headers for the last good scrape
+    of this page, if the server sent validators.
+    """
+    state = _get_page_state((url, team_1, team_2))
+    headers = {}
+    if state is not None:
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+    return headers
+
+
+def handle_score_response(url, team_1, team_2, status_code, headers, body, text):
+    """
+    Turn a scorecard response into a ScoreFetch. A 304 or a body identical to
+    the last one returns the previous dict without parsing, and a parse that
+    yields the same dict is also reported as unchanged.
+    """
+    key = (url, team_1, team_2)
+    state = _get_page_state(key)
+    if status_code == 304:
+        if state is None:
+            return ScoreFetch(dict(FETCH_ERROR), True)
+        return ScoreFetch(state.data, False)
+
+    body_hash = hashlib.sha1(body).hexdigest()
+    if state is not None and state.body_hash == body_hash:
+        return ScoreFetch(state.data, False)
+
+    data = parse_live_score(text() if callable(text) else text, team_1, team_2)
+    _set_page_state(key, _PageState(
+        etag=headers.get('ETag', ''),
+        last_modified=headers.get('Last-Modified', ''),
+        body_hash=body_hash,
+        data=data,
+    ))
+    return ScoreFetch(data, state is None or state.data != data)
+
+
+def fetch_live_score(url, team_1=None, team_2=None):
+    """
+    Fetch live cricket score details from given URL with a conditional
+    request. Returns a ScoreFetch.
+    """
+    guard = guard_for(url)
+    verdict = guard.acquire()
+    if verdict != ALLOWED:
+        return skipped_fetch(verdict)
     try:
-        team1_perc = safe_get_text(soup, ('div', 'percentageScreenText'), 0, default="0").replace("%", "")
-        team2_perc = safe_get_text(soup, ('div', 'percentageScreenText'), 1, default="0").replace("%", "")
+        response = _session.get(
+            url, timeout=REQUEST_TIMEOUT, headers=conditional_headers(url, team_1, team_2)
+        )
     except Exception:
-        pass
+        guard.record_failure()
+        return ScoreFetch(dict(FETCH_ERROR), True)
+    guard.record_response(response.status_code, response.headers.get('Retry-After'))
+    if response.status_code >= 400:
+        return ScoreFetch(dict(FETCH_ERROR), True)
+
+    return handle_score_response(
+        url, team_1, team_2, response.status_code, response.headers,
+        response.content, lambda: response.text,
+    )
+
+
+def get_live_score(url, team_1=None, team_2=None):
+    """
+    Fetch live cricket score details from given URL.
+    """
+    return fetch_live_score(url, team_1, team_2).data
 
+
+# (tag name, class) pairs the scorecard fields are read from. A class with a
+# space must equal the whole class attribute, the same rule BeautifulSoup's
+# ``class_`` filter applies.
+SCORE_SELECTORS = (
+    ('h1', 'name-wrapper'),
+    ('div', 'runs f-runs'),
+    ('div', 'teamNameScreenText'),
+    ('span', 'title'),
+    ('div', 'result-box'),
+    ('div', 'final-result m-none'),
+    ('div', 'final-result comment m-none'),
+    ('div', 'batsmen-name'),
+    ('div', 'batsmen-score'),
+    ('div', 'bowler-name'),
+    ('div', 'bowler-figures'),
+    ('div', 'percentageScreenText'),
+)
+
+
+def _collect_fields(soup):
+    """
+    Walk the tree once and bucket every element matching SCORE_SELECTORS,
+    in document order.
+    """
+    found = {selector: [] for selector in SCORE_SELECTORS}
+    for tag in soup.find_all(True):
+        classes = tag.get('class')
+        if not classes:
+            continue
+        if len(classes) > 1:
+            hits = found.get((tag.name, " ".join(classes)))
+            if hits is not None:
+                hits.append(tag)
+            classes = set(classes)
+        for cls in classes:
+            hits = found.get((tag.name, cls))
+            if hits is not None:
+                hits.append(tag)
+    return found
+
+
+def _field_text(found, selector, index=0, default="", join_strings=False):
+    elements = found[selector]
+    if len(elements) <= index:
+        return default
+    if join_strings:
+        return " ".join(elements[index].stripped_strings)
+    return elements[index].get_text(strip=True)
+
+
+def _build_score(match_name, score, over, team1, team2, crr, main_message,
+                 extra_message, extra_message1, batsman_1, batsman_1_score,
+                 batsman_2, batsman_2_score, bowler, bowler_score,
+                 team1_perc, team2_perc):
+    """
+    Derive the favourite and odds from the win percentages and assemble the
+    live score dict.
+    """
     fav_team, odd_1, odd_2 = "", "00", "00"
     try:
         t1 = int(team1_perc)
@@ -117,6 +276,96 @@ def get_live_score(url, team_1=None, team_2=None):
     return d if any(v for v in d.values() if v) else {"error": "Score not available"}
 
 
+def parse_live_score(html, team_1=None, team_2=None):
+    """
+    Parse a scorecard page into the live score dict.
+
+    The tree is walked once instead of once per field. Returns exactly what
+    ``parse_live_score_legacy`` returns. The full tree is built on purpose:
+    with a ``SoupStrainer`` an element left unclosed in the page is no
+    longer closed by its ancestor's end tag and swallows the fields after
+    it.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    found = _collect_fields(soup)
+
+    # Score + Over
+    score, over = "", ""
+    runs = found[('div', 'runs f-runs')]
+    if runs:
+        spans = runs[0].find_all("span")
+        if len(spans) >= 2:
+            score = spans[0].get_text(strip=True)
+            over = spans[1].get_text(strip=True)
+
+    return _build_score(
+        match_name=_field_text(found, ('h1', 'name-wrapper')),
+        score=score,
+        over=over,
+        team1=team_1 or _field_text(found, ('div', 'teamNameScreenText'), 0),
+        team2=team_2 or _field_text(found, ('div', 'teamNameScreenText'), 1),
+        crr=_field_text(found, ('span', 'title')),
+        main_message=_field_text(found, ('div', 'result-box')),
+        extra_message=_field_text(found, ('div', 'final-result m-none'), 0, join_strings=True),
+        extra_message1=_field_text(found, ('div', 'final-result comment m-none'), 0, join_strings=True),
+        batsman_1=_field_text(found, ('div', 'batsmen-name'), 0),
+        batsman_1_score=_field_text(found, ('div', 'batsmen-score'), 0),
+        batsman_2=_field_text(found, ('div', 'batsmen-name'), 1),
+        batsman_2_score=_field_text(found, ('div', 'batsmen-score'), 1),
+        bowler=_field_text(found, ('div', 'bowler-name'), 0),
+        bowler_score=_field_text(found, ('div', 'bowler-figures'), 0),
+        team1_perc=_field_text(found, ('div', 'percentageScreenText'), 0, default="0").replace("%", ""),
+        team2_perc=_field_text(found, ('div', 'percentageScreenText'), 1, default="0").replace("%", ""),
+    )
+
+
+def parse_live_score_legacy(html, team_1=None, team_2=None):
+    """
+    The original parser, one ``find_all`` per field over the full tree. Kept
+    as the reference ``benchmark_scraper`` checks ``parse_live_score`` against.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    match_name = safe_get_text(soup, ('h1', 'name-wrapper'))
+
+    # Score + Over
+    score, over = "", ""
+    a = soup.find('div', class_='runs f-runs')
+    if a:
+        spans = a.find_all("span")
+        if len(spans) >= 2:
+            score = spans[0].get_text(strip=True)
+            over = spans[1].get_text(strip=True)
+
+    # Percentages
+    team1_perc, team2_perc = "0", "0"
+    try:
+        team1_perc = safe_get_text(soup, ('div', 'percentageScreenText'), 0, default="0").replace("%", "")
+        team2_perc = safe_get_text(soup, ('div', 'percentageScreenText'), 1, default="0").replace("%", "")
+    except Exception:
+        pass
+
+    return _build_score(
+        match_name=match_name,
+        score=score,
+        over=over,
+        team1=team_1 or safe_get_text(soup, ('div', 'teamNameScreenText'), 0),
+        team2=team_2 or safe_get_text(soup, ('div', 'teamNameScreenText'), 1),
+        crr=safe_get_text(soup, ('span', 'title')),
+        main_message=safe_get_text(soup, ('div', 'result-box')),
+        extra_message=safe_get_text(soup, ('div', 'final-result m-none'), 0, join_strings=True),
+        extra_message1=safe_get_text(soup, ('div', 'final-result comment m-none'), 0, join_strings=True),
+        batsman_1=safe_get_text(soup, ('div', 'batsmen-name'), 0),
+        batsman_1_score=safe_get_text(soup, ('div', 'batsmen-score'), 0),
+        batsman_2=safe_get_text(soup, ('div', 'batsmen-name'), 1),
+        batsman_2_score=safe_get_text(soup, ('div', 'batsmen-score'), 1),
+        bowler=safe_get_text(soup, ('div', 'bowler-name'), 0),
+        bowler_score=safe_get_text(soup, ('div', 'bowler-figures'), 0),
+        team1_perc=team1_perc,
+        team2_perc=team2_perc,
+    )
+
+
 if __name__ == "__main__":
     # 🔹 Quick test runner
     TEST_URL = "https://www.espncricinfo.com/live-cricket-score"  # replace with real match URL
@@ -0,0 +1,163 @@
+"""
+Incremental per-user rollups (UserStats, UserGameDailyStats).
+
+Every function here must run inside the transaction that makes the change it
+records, so a rollup can never disagree with a committed bet or payment.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import UserGameDailyStats, UserStats
+
+ZERO = Decimal('0')
+STATS_FIELDS = ('bets', 'wagered', 'won', 'deposited', 'withdrawn', 'pending_withdrawals')
+DAILY_FIELDS = ('bets', 'wagered', 'won')
+
+
+def _bump(model, lookup, **deltas):
+    """
+    Add ``deltas`` to the row matching ``lookup`` with one UPDATE, creating
+    the row on first use.
+    """
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another transaction created the row first.
+        model.objects.filter(**lookup).update(**changes)
+
+
+def record_bets(bets):
+    """
+    Add saved CasinoBets to the rollups: one UPDATE per (user, game, day)
+    and one per user, however many bets there are.
+    """
+    per_day = defaultdict(lambda: [0, ZERO, ZERO])
+    per_user = defaultdict(lambda: [0, ZERO, ZERO])
+    for bet in bets:
+        day = timezone.localdate(bet.timestamp)
+        for totals in (per_day[(bet.user_profile_id, bet.game_name, day)], per_user[bet.user_profile_id]):
+            totals[0] += 1
+            totals[1] += Decimal(bet.bet_amount)
+            totals[2] += Decimal(bet.winnings)
+
+    for (profile_id, game_name, day), (count, wagered, won) in per_day.items():
+        _bump(UserGameDailyStats, {'user_profile_id': profile_id, 'game_name': game_name, 'day': day},
+              bets=count, wagered=wagered, won=won)
+    for profile_id, (count, wagered, won) in per_user.items():
+        _bump(UserStats, {'user_profile_id': profile_id}, bets=count, wagered=wagered, won=won)
+
+
+def record_bet_winnings(bet, winnings):
+    """
+    Winnings paid on an already recorded bet (Mines cashout).
+    """
+    _bump(UserGameDailyStats, {
+        'user_profile_id': bet.user_profile_id,
+        'game_name': bet.game_name,
+        'day': timezone.localdate(bet.timestamp),
+    }, won=winnings)
+    _bump(UserStats, {'user_profile_id': bet.user_profile_id}, won=winnings)
+
+
+def record_deposit(profile_id, amount):
+    _bump(UserStats, {'user_profile_id': profile_id}, deposited=amount)
+
+
+def record_withdrawal_requested(profile_id, amount):
+    _bump(UserStats, {'user_profile_id': profile_id}, pending_withdrawals=amount)
+
+
+def record_withdrawal_settled(profile_id, amount, approved):
+    """
+    A pending withdrawal was approved (money left) or rejected (refunded).
+    """
+    _bump(UserStats, {'user_profile_id': profile_id},
+          pending_withdrawals=-amount, withdrawn=amount if approved else ZERO)
+
+
+# --- Full rebuild (reconcile_stats and the 0011 data migration) ---
+
+def empty_totals(fields):
+    return {field: 0 if field == 'bets' else ZERO for field in fields}
+
+
+def rebuild_rollups(profile_ids=None, apps=global_apps):
+    """
+    ``(stats, daily)`` rollups computed from CasinoBet, Transaction and
+    WithdrawalRequest, for every user or only ``profile_ids``: ``stats``
+    maps profile id and ``daily`` ``(profile id, game, day)`` to the field
+    values. ``apps`` lets a migration pass its historical models.
+    """
+    CasinoBet = apps.get_model('accounts', 'CasinoBet')
+    Transaction = apps.get_model('accounts', 'Transaction')
+    WithdrawalRequest = apps.get_model('accounts', 'WithdrawalRequest')
+
+    def only(queryset):
+        return queryset if profile_ids is None else queryset.filter(user_profile_id__in=profile_ids)
+
+    stats = defaultdict(lambda: empty_totals(STATS_FIELDS))
+    daily = {}
+
+    bets = (
+        only(CasinoBet.objects)
+        .annotate(day=TruncDate('timestamp', tzinfo=timezone.get_current_timezone()))
+        .values('user_profile_id', 'game_name', 'day')
+        .annotate(bets=Count('id'), wagered=Sum('bet_amount'), won=Sum('winnings'))
+        .order_by()
+    )
+    for row in bets:
+        key = (row['user_profile_id'], row['game_name'], row['day'])
+        daily[key] = {field: row[field] for field in DAILY_FIELDS}
+        for field in DAILY_FIELDS:
+            stats[row['user_profile_id']][field] += row[field]
+
+    money = (
+        only(Transaction.objects)
+        .filter(transaction_type__in=('deposit', 'withdraw'))
+        .values('user_profile_id', 'transaction_type')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    for row in money:
+        field = 'deposited' if row['transaction_type'] == 'deposit' else 'withdrawn'
+        stats[row['user_profile_id']][field] += row['total']
+
+    pending = (
+        only(WithdrawalRequest.objects).filter(status='pending')
+        .values('user_profile_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    for row in pending:
+        stats[row['user_profile_id']]['pending_withdrawals'] += row['total']
+
+    return dict(stats), daily
+
+
+def write_rollups(stats, daily, apps=global_apps):
+    """
+    Insert rebuilt rollups; the rows they replace must be deleted first.
+    """
+    UserStats = apps.get_model('accounts', 'UserStats')
+    UserGameDailyStats = apps.get_model('accounts', 'UserGameDailyStats')
+    UserStats.objects.bulk_create(
+        UserStats(user_profile_id=key, **values) for key, values in stats.items()
+    )
+    UserGameDailyStats.objects.bulk_create(
+        UserGameDailyStats(user_profile_id=key[0], game_name=key[1], day=key[2], **values)
+        for key, values in daily.items()
+    )
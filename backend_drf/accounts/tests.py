@@ -1,3 +1,1268 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import threading
+import time
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import async_scraper, db_router, mines, score_cache, score_history, scrape_guard, scraper
+from .authentication import PROFILE_ID_CLAIM, ClaimsUser, CricBetTokenObtainPairSerializer, revoke_token
+from .casino_engine import OutcomeEngine, np
+from .games import DICE_MULTIPLIERS
+from .game_state import GRID_SIZE, get_store as get_game_store, mask_from_tiles, tiles_from_mask
+from .scraper import RATE_LIMITED, ScoreFetch, parse_live_score, parse_live_score_legacy, skipped_fetch
+from .models import (
+    OTP, CasinoBet, DepositRequest, Matchess, ScoreSnapshot, Transaction, UserProfile, UserStats, WithdrawalRequest,
+)
+
+# Tests that touch cached state get a private in-memory cache, not the
+# development FileBasedCache.
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'mines': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'mines'},
+}
+
+
+def api_client(user):
+    # The same claims the login endpoint puts in the token.
+    token = CricBetTokenObtainPairSerializer.get_token(user).access_token
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@skipUnless(connection.vendor == 'sqlite', "Query plans are checked with SQLite's EXPLAIN QUERY PLAN.")
+@override_settings(CACHES=TEST_CACHES)
+class HistoryQueryPlanTests(TestCase):
+    """
+    Every per-user history query must be answered from its composite index,
+    without scanning the table or sorting in a temp B-tree.
+    """
+
+    # endpoint -> (table, index the query must use)
+    ENDPOINTS = {
+        '/api/v1/transaction-history/': ('accounts_transaction', 'transaction_user_ts_idx'),
+        '/api/v1/deposit/history/': ('accounts_depositrequest', 'deposit_user_ts_idx'),
+        '/api/v1/withdraw/history/': ('accounts_withdrawalrequest', 'withdrawal_user_ts_idx'),
+        '/api/v1/bets/casino/': ('accounts_casinobet', 'casinobet_user_ts_idx'),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player', 'player@example.com', 'secret-pass')
+        profile = cls.user.profile
+        for i in range(3):
+            DepositRequest.objects.create(user_profile=profile, amount=Decimal('10'), otp_provided=str(i))
+            WithdrawalRequest.objects.create(user_profile=profile, amount=Decimal('5'))
+            CasinoBet.objects.create(user_profile=profile, game_name='Dice', bet_amount=Decimal('1'), winnings=Decimal('2'))
+            Transaction.objects.create(user_profile=profile, transaction_type='deposit', amount=Decimal('10'))
+
+    def setUp(self):
+        cache.clear()
+        self.client = api_client(self.user)
+
+    def query_plans(self, url, table, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if sql.startswith('SELECT') and f'FROM "{table}"' in sql:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plans.append(' | '.join(row[-1] for row in cursor.fetchall()))
+        return plans
+
+    def test_history_endpoints_use_indexes(self):
+        for url, (table, index) in self.ENDPOINTS.items():
+            with self.subTest(url=url):
+                plans = self.query_plans(url, table)
+                self.assertTrue(plans, f"{url} ran no query against {table}")
+                for plan in plans:
+                    self.assertIn(index, plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_cursor_pages_use_indexes(self):
+        for url, (table, index) in self.ENDPOINTS.items():
+            with self.subTest(url=url):
+                cursor = self.client.get(url, {'limit': 1}).json()['next_cursor']
+                self.assertIsNotNone(cursor)
+                for plan in self.query_plans(url, table, {'limit': 1, 'cursor': cursor}):
+                    self.assertIn(index, plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ScoreHistoryTests(TestCase):
+    """
+    The score rebuilt from keyframes and diffs must equal what was recorded.
+    """
+
+    def setUp(self):
+        self.match = Matchess.objects.create(
+            match_id=1, match_name='A v B', Team1='A', Team2='B',
+            date=datetime.date(2026, 1, 1), time=datetime.time(10), img='a.png', url='https://example.com/1',
+        )
+        cache.clear()
+        self.start = timezone.now()
+        self.scores = []
+        for ball in range(120):
+            score = {'score': f'{ball * 2}/1', 'over': f'{ball // 6}.{ball % 6}', 'fav_team': 'A', 'odd_1': '40', 'odd_2': '41'}
+            if ball % 7 == 0:
+                score['extra_message'] = 'Drinks'
+            self.scores.append(score)
+            with mock.patch('accounts.score_history.timezone.now', return_value=self.at(ball)):
+                score_history.record(self.match.pk, dict(score, stale=False))
+                # A repeat of the same score is not recorded.
+                score_history.record(self.match.pk, score)
+
+    def at(self, ball):
+        return self.start + datetime.timedelta(seconds=ball)
+
+    def test_only_changes_are_stored(self):
+        self.assertEqual(ScoreSnapshot.objects.filter(match=self.match).count(), 120)
+        self.assertEqual(ScoreSnapshot.objects.filter(match=self.match, is_keyframe=True).count(), 3)
+        row = ScoreSnapshot.objects.get(match=self.match, seq=3)
+        self.assertEqual(row.changes, {'score': '4/1', 'over': '0.2'})
+
+    def test_state_at(self):
+        self.assertIsNone(score_history.state_at(self.match.pk, self.at(-1)))
+        for ball in (0, 1, 7, 8, 49, 50, 51, 119):
+            with self.subTest(ball=ball):
+                state = score_history.state_at(self.match.pk, self.at(ball))
+                self.assertEqual(state['seq'], ball + 1)
+                self.assertEqual(state['score'], self.scores[ball])
+
+    def test_changes_since_cursor(self):
+        state, cursor = {}, 0
+        while True:
+            rows, cursor = score_history.changes_since(self.match.pk, cursor, limit=16)
+            if not rows:
+                break
+            for row in rows:
+                state = dict(row['changes']) if row['keyframe'] else score_history.apply(state, row['changes'])
+        self.assertEqual(cursor, 120)
+        self.assertEqual(state, self.scores[-1])
+
+
+class ParseLiveScoreTests(TestCase):
+    """
+    The single-pass parser must return exactly what the legacy one does,
+    including on the unclosed tags scraped pages are full of.
+    """
+
+    FIXTURES_DIR = Path(__file__).resolve().parent / 'scraper_fixtures'
+    MALFORMED = {
+        'cell closed by its row': (
+            '<table><tr><td><div class="result-box">A</td><td>B</td></tr></table>'
+            '<span class="title">CRR 5</span>'
+        ),
+        'div closed by its section': (
+            '<section><div class="result-box">Won<span>by 5</section>'
+            '<div class="batsmen-name">Kohli</div>'
+        ),
+        'unclosed score divs': (
+            '<div class="runs f-runs"><span>120/3<span>15.2</div>'
+            '<div class="teamNameScreenText">IND<div class="teamNameScreenText">AUS'
+            '<div class="percentageScreenText">40%</div><div class="percentageScreenText">60%'
+        ),
+        'unclosed messages': (
+            '<div class="final-result m-none"><b>India<i> need 20</div>'
+            '<div class="final-result comment m-none">Rain<p>delay'
+            '<div class="bowler-name">Starc<div class="bowler-figures">2-30</body>'
+        ),
+    }
+
+    def test_fixtures(self):
+        pages = sorted(self.FIXTURES_DIR.glob('*.html'))
+        self.assertTrue(pages)
+        for page in pages:
+            html = page.read_text(encoding='utf-8')
+            for teams in ((), ('IND', 'AUS')):
+                with self.subTest(page=page.name, teams=teams):
+                    self.assertEqual(parse_live_score(html, *teams), parse_live_score_legacy(html, *teams))
+
+    def test_malformed_markup(self):
+        for name, html in self.MALFORMED.items():
+            with self.subTest(name):
+                self.assertEqual(parse_live_score(html), parse_live_score_legacy(html))
+
+    def test_unclosed_tag_does_not_swallow_later_fields(self):
+        data = parse_live_score(self.MALFORMED['cell closed by its row'])
+        self.assertEqual(data['main_message'], 'A')
+        self.assertEqual(data['CRR'], 'CRR 5')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class InstantBetTests(TestCase):
+    """
+    Dice and Coin Flip go through ``wallet.settle_instant_bet``: one
+    conditional balance update plus the CasinoBet and its ledger rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player', 'player@example.com', 'secret-pass')
+        cls.profile = cls.user.profile
+        cls.profile.balance = Decimal('100.00')
+        cls.profile.save()
+
+    def setUp(self):
+        cache.clear()
+        self.client = api_client(self.user)
+
+    def balance(self):
+        self.profile.refresh_from_db()
+        return self.profile.balance
+
+    def ledger(self):
+        return list(
+            Transaction.objects.filter(user_profile=self.profile).order_by('id').values_list('transaction_type', 'amount')
+        )
+
+    def test_dice_win(self):
+        with mock.patch('accounts.views.roll_dice', return_value=(1, 2, 2)):
+            response = self.client.post('/api/v1/casino/dice/bet/', {'amount': '10', 'choice': 'under'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['outcome'], 'win')
+        self.assertEqual(self.balance(), Decimal('110.00'))
+        bet = CasinoBet.objects.get(user_profile=self.profile)
+        self.assertEqual((bet.game_name, bet.bet_amount, bet.winnings, bet.multiplier), ('Dice', 10, 20, 2))
+        self.assertEqual(self.ledger(), [('bet_placed', Decimal('10.00')), ('bet_won', Decimal('20.00'))])
+
+    def test_coin_flip_loss(self):
+        with mock.patch('accounts.views.flip_coin', return_value=('tails', 0)):
+            response = self.client.post('/api/v1/casino/coin-flip/bet/', {'amount': '12.50', 'choice': 'heads'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.balance(), Decimal('87.50'))
+        bet = CasinoBet.objects.get(user_profile=self.profile)
+        self.assertEqual((bet.game_name, bet.bet_amount, bet.winnings), ('Coin Flip', Decimal('12.50'), 0))
+        self.assertEqual(self.ledger(), [('bet_placed', Decimal('12.50'))])
+
+    def test_insufficient_funds_changes_nothing(self):
+        for url in ('/api/v1/casino/dice/bet/', '/api/v1/casino/coin-flip/bet/'):
+            with self.subTest(url=url):
+                response = self.client.post(url, {'amount': '100.01', 'choice': 'heads' if 'coin' in url else '7'})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data, {'error': 'Insufficient funds.'})
+        self.assertEqual(self.balance(), Decimal('100.00'))
+        self.assertFalse(CasinoBet.objects.exists())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_stake_equal_to_balance(self):
+        with mock.patch('accounts.views.roll_dice', return_value=(6, 6, 0)):
+            response = self.client.post('/api/v1/casino/dice/bet/', {'amount': '100', 'choice': 'under'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.balance(), Decimal('0.00'))
+        self.assertEqual(self.ledger(), [('bet_placed', Decimal('100.00'))])
+
+    def test_invalid_amounts(self):
+        for url in ('/api/v1/casino/dice/bet/', '/api/v1/casino/coin-flip/bet/'):
+            for amount in ('0', '-5', 'abc', 'NaN', None):
+                with self.subTest(url=url, amount=amount):
+                    data = {'choice': 'heads' if 'coin' in url else '7'}
+                    if amount is not None:
+                        data['amount'] = amount
+                    response = self.client.post(url, data)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.data, {'error': 'Invalid bet amount.'})
+        self.assertEqual(self.balance(), Decimal('100.00'))
+        self.assertFalse(CasinoBet.objects.exists())
+        self.assertFalse(Transaction.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MinesGameTests(TestCase):
+    """
+    Mines is played server-side: the stake is taken on bet, each reveal is
+    checked against the stored mine mask, and the cashout pays from the
+    multiplier table exactly once.
+    """
+    MINES = (0, 1, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player', 'player@example.com', 'secret-pass')
+        cls.profile = cls.user.profile
+        cls.profile.balance = Decimal('100.00')
+        cls.profile.save()
+
+    def setUp(self):
+        cache.clear()
+        caches['mines'].clear()
+        self.client = api_client(self.user)
+        engine = mock.Mock()
+        engine.mine_mask.return_value = mask_from_tiles(self.MINES)
+        with mock.patch('accounts.views.get_engine', return_value=engine):
+            response = self.client.post('/api/v1/casino/mines/bet/', {'amount': '10', 'mines': len(self.MINES)})
+        self.assertEqual(response.status_code, 200)
+        self.bet = CasinoBet.objects.get(pk=response.data['bet_id'])
+
+    def reveal(self, tile):
+        return self.client.post('/api/v1/casino/mines/reveal/', {'tile': tile})
+
+    def cashout(self):
+        return self.client.post('/api/v1/casino/mines/cashout/')
+
+    def balance(self):
+        self.profile.refresh_from_db()
+        return self.profile.balance
+
+    def test_bet_takes_the_stake(self):
+        self.assertEqual(self.balance(), Decimal('90.00'))
+        self.assertEqual((self.bet.bet_amount, self.bet.winnings), (Decimal('10.00'), 0))
+
+    def test_gem_then_mine(self):
+        response = self.reveal(10)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['outcome'], 'gem')
+        self.assertEqual(response.data['safe_reveals'], 1)
+        self.assertEqual(response.data['multiplier'], mines.multiplier(3, 1))
+
+        response = self.reveal(1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['outcome'], 'mine')
+        self.assertEqual(response.data['mine_tiles'], list(self.MINES))
+
+        # The game is over: no cashout, no payout.
+        self.assertEqual(self.cashout().status_code, 400)
+        self.assertEqual(self.balance(), Decimal('90.00'))
+        self.bet.refresh_from_db()
+        self.assertEqual(self.bet.winnings, 0)
+
+    def test_invalid_reveals(self):
+        self.assertEqual(self.reveal(10).status_code, 200)
+        for tile in (10, 25, -1, 'x'):
+            with self.subTest(tile=tile):
+                self.assertEqual(self.reveal(tile).status_code, 400)
+        # The game is still on.
+        self.assertEqual(self.reveal(11).data['safe_reveals'], 2)
+
+    def test_cashout_before_reveal(self):
+        response = self.cashout()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Reveal at least one tile before cashing out.'})
+        self.assertEqual(self.balance(), Decimal('90.00'))
+        self.assertEqual(self.reveal(10).data['outcome'], 'gem')
+
+    def test_cashout_pays_once(self):
+        for tile in (10, 11, 12):
+            self.assertEqual(self.reveal(tile).data['outcome'], 'gem')
+        expected = mines.payout(Decimal('10.00'), 3, 3)
+
+        response = self.cashout()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['winnings'], expected)
+        self.assertEqual(response.data['mine_tiles'], list(self.MINES))
+        self.assertEqual(self.balance(), Decimal('90.00') + expected)
+        self.bet.refresh_from_db()
+        self.assertEqual(self.bet.winnings, expected)
+        self.assertEqual(self.bet.multiplier, mines.multiplier(3, 3))
+
+        self.assertEqual(self.cashout().status_code, 400)
+        self.assertEqual(self.reveal(13).status_code, 400)
+        self.assertEqual(self.balance(), Decimal('90.00') + expected)
+
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AutobetTests(TestCase):
+    """
+    An autobet run settles every round it plays: one CasinoBet and its
+    ledger rows per round, and a final balance of start - wagered + won.
+    """
+    WIN, LOSS = ('heads', 2), ('tails', 0)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player', 'player@example.com', 'secret-pass')
+        cls.profile = cls.user.profile
+
+    def setUp(self):
+        cache.clear()
+        self.client = api_client(self.user)
+
+    def set_balance(self, amount):
+        self.profile.balance = Decimal(amount)
+        self.profile.save()
+
+    def run_coin(self, flips, **data):
+        data = {'choice': 'heads', 'amount': '10', **data}
+        with mock.patch('accounts.views.flip_coin', side_effect=flips):
+            return self.client.post('/api/v1/casino/coin-flip/autobet/', data)
+
+    def assert_settled(self, response, start, rounds):
+        self.assertEqual(response.status_code, 200)
+        run = response.data
+        self.assertEqual(run['rounds'], rounds)
+        self.assertEqual(len(run['results']), rounds)
+        self.assertEqual(run['wagered'], Decimal('10') * rounds)
+        self.assertEqual(run['net'], run['won'] - run['wagered'])
+        self.assertEqual(run['balance'], Decimal(start) - run['wagered'] + run['won'])
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, run['balance'])
+
+        bets = CasinoBet.objects.filter(user_profile=self.profile)
+        self.assertEqual(bets.count(), rounds)
+        self.assertTrue(all(bet.bet_amount == Decimal('10') for bet in bets))
+        self.assertEqual(sum(bet.winnings for bet in bets), run['won'])
+        ledger = Transaction.objects.filter(user_profile=self.profile)
+        placed = ledger.filter(transaction_type='bet_placed')
+        won = ledger.filter(transaction_type='bet_won')
+        self.assertEqual(placed.count(), rounds)
+        self.assertEqual(sum(row.amount for row in placed), run['wagered'])
+        self.assertEqual(won.count(), sum(1 for bet in bets if bet.winnings > 0))
+        self.assertEqual(sum(row.amount for row in won), run['won'])
+        return run
+
+    def test_plays_every_round(self):
+        self.set_balance('100.00')
+        response = self.run_coin([self.WIN, self.LOSS, self.WIN, self.LOSS], rounds=4)
+        run = self.assert_settled(response, '100.00', 4)
+        self.assertEqual(run['stopped'], 'rounds')
+        self.assertEqual(run['results'], ['h', 't', 'h', 't'])
+        self.assertEqual(run['balance'], Decimal('100.00'))
+
+    def test_stop_loss(self):
+        self.set_balance('100.00')
+        response = self.run_coin([self.LOSS] * 10, rounds=10, stop_loss='25')
+        run = self.assert_settled(response, '100.00', 3)
+        self.assertEqual(run['stopped'], 'stop_loss')
+        self.assertEqual(run['balance'], Decimal('70.00'))
+
+    def test_take_profit(self):
+        self.set_balance('100.00')
+        response = self.run_coin([self.WIN] * 10, rounds=10, take_profit='15')
+        run = self.assert_settled(response, '100.00', 2)
+        self.assertEqual(run['stopped'], 'take_profit')
+        self.assertEqual(run['balance'], Decimal('120.00'))
+
+    def test_runs_out_of_funds(self):
+        self.set_balance('25.00')
+        response = self.run_coin([self.LOSS] * 5, rounds=5)
+        run = self.assert_settled(response, '25.00', 2)
+        self.assertEqual(run['stopped'], 'insufficient_funds')
+        self.assertEqual(run['balance'], Decimal('5.00'))
+
+    def test_dice(self):
+        self.set_balance('100.00')
+        rolls = [(1, 2, 2), (3, 4, 0), (6, 6, 0)]
+        with mock.patch('accounts.views.roll_dice', side_effect=rolls):
+            response = self.client.post('/api/v1/casino/dice/autobet/', {'choice': 'under', 'amount': '10', 'rounds': 3})
+        run = self.assert_settled(response, '100.00', 3)
+        self.assertEqual(run['stopped'], 'rounds')
+        self.assertEqual(run['results'], [[1, 2, 2], [3, 4, 0], [6, 6, 0]])
+        self.assertEqual(run['balance'], Decimal('90.00'))
+
+    def test_invalid_input(self):
+        self.set_balance('100.00')
+        for data in (
+            {'amount': 'NaN'}, {'amount': 'sNaN'}, {'amount': 'Infinity'}, {'amount': '0'}, {'amount': '-5'},
+            {'amount': 'ten'}, {'rounds': '0'}, {'rounds': 'x'}, {'stop_loss': 'NaN'}, {'take_profit': '-1'},
+            {'choice': 'edge'},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.run_coin([self.WIN], **{'rounds': 1, **data}).status_code, 400)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, Decimal('100.00'))
+        self.assertFalse(CasinoBet.objects.exists())
+
+    def test_stake_above_balance(self):
+        self.set_balance('5.00')
+        response = self.run_coin([self.WIN], rounds=3)
+        self.assertEqual(response.status_code, 400)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, Decimal('5.00'))
+        self.assertFalse(CasinoBet.objects.exists())
+        self.assertFalse(Transaction.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BalanceCacheTests(TransactionTestCase):
+    """
+    Every balance write shows up in the next ``/user-profile/``. A
+    TransactionTestCase, since the cache is updated on commit and TestCase
+    never commits.
+    """
+
+    def setUp(self):
+        cache.clear()
+        caches['mines'].clear()
+        self.user = User.objects.create_user('player', 'player@example.com', 'secret-pass')
+        self.profile = self.user.profile
+        self.profile.balance = Decimal('100.00')
+        self.profile.save()
+        self.client = api_client(self.user)
+
+    def cached_balance(self):
+        response = self.client.get('/api/v1/user-profile/')
+        self.assertEqual(response.status_code, 200)
+        return Decimal(str(response.data['balance']))
+
+    def assert_balance(self, expected):
+        self.assertEqual(self.cached_balance(), Decimal(expected))
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, Decimal(expected))
+
+    def test_warm_hit_runs_no_queries(self):
+        self.assert_balance('100.00')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.cached_balance(), Decimal('100.00'))
+        self.assertEqual(len(queries), 0, [query['sql'] for query in queries])
+
+    def test_instant_bets(self):
+        self.assert_balance('100.00')
+        with mock.patch('accounts.views.roll_dice', return_value=(1, 2, 2)):
+            self.assertEqual(self.client.post('/api/v1/casino/dice/bet/', {'choice': 'under', 'amount': '10'}).status_code, 200)
+        self.assert_balance('110.00')
+        with mock.patch('accounts.views.flip_coin', return_value=('tails', 0)):
+            self.assertEqual(self.client.post('/api/v1/casino/coin-flip/bet/', {'choice': 'heads', 'amount': '30'}).status_code, 200)
+        self.assert_balance('80.00')
+
+    def test_mines_bet_and_cashout(self):
+        self.assert_balance('100.00')
+        engine = mock.Mock()
+        engine.mine_mask.return_value = mask_from_tiles([0])
+        with mock.patch('accounts.views.get_engine', return_value=engine):
+            self.client.post('/api/v1/casino/mines/bet/', {'amount': '10', 'mines': 1})
+        self.assert_balance('90.00')
+        self.assertEqual(self.client.post('/api/v1/casino/mines/reveal/', {'tile': 5}).data['outcome'], 'gem')
+        response = self.client.post('/api/v1/casino/mines/cashout/')
+        self.assertEqual(response.status_code, 200)
+        self.assert_balance(Decimal('90.00') + mines.payout(Decimal('10.00'), 1, 1))
+
+    def test_deposit_approval(self):
+        deposit = DepositRequest.objects.create(user_profile=self.profile, amount=Decimal('25.00'), otp_provided='TX1')
+        self.assert_balance('100.00')
+        with transaction.atomic():
+            deposit.status = 'approved'
+            deposit.save()
+        self.assert_balance('125.00')
+
+    def test_withdrawal_request(self):
+        self.assert_balance('100.00')
+        OTP.objects.create(user=self.user, code='123456', expires_at=timezone.now() + datetime.timedelta(minutes=5))
+        response = self.client.post('/api/v1/withdraw/request/', {'otp': '123456', 'amount': '40'})
+        self.assertEqual(response.status_code, 201)
+        self.assert_balance('60.00')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StatelessJWTTests(TestCase):
+    """
+    Tokens from ``token/`` carry the claims requests are authenticated
+    from; deactivation and revocation still take effect at once.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player', 'player@example.com', 'secret-pass')
+
+    def setUp(self):
+        cache.clear()
+        caches['mines'].clear()
+
+    def login(self):
+        response = APIClient().post('/api/v1/token/', {'username': 'player', 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get_profile(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client.get('/api/v1/user-profile/')
+
+    def refresh(self, refresh):
+        return APIClient().post('/api/v1/token/refresh/', {'refresh': refresh})
+
+    def test_login_tokens_carry_claims(self):
+        tokens = self.login()
+        for token in (AccessToken(tokens['access']), RefreshToken(tokens['refresh'])):
+            self.assertEqual(token[PROFILE_ID_CLAIM], self.user.profile.pk)
+            self.assertEqual(token['username'], 'player')
+            self.assertIs(token['is_active'], True)
+
+        user = ClaimsUser(AccessToken(tokens['access']))
+        self.assertEqual((user.id, user.pk), (self.user.pk, self.user.pk))
+        self.assertIsInstance(user.id, int)
+        self.assertEqual(user.profile.pk, self.user.profile.pk)
+
+        # The id reaches state keyed or filtered by it as an int.
+        profile = self.user.profile
+        profile.balance = Decimal('50.00')
+        profile.save()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        with mock.patch('accounts.views.get_engine') as engine:
+            engine.return_value.mine_mask.return_value = mask_from_tiles([0])
+            response = client.post('/api/v1/casino/mines/bet/', {'amount': '10', 'mines': 1})
+        game = get_game_store().get(response.data['bet_id'])
+        self.assertEqual(game.user_id, self.user.pk)
+        self.assertIsInstance(game.user_id, int)
+        self.assertEqual(get_game_store().active_for(self.user.pk), game)
+
+    def test_deactivated_user_is_rejected(self):
+        tokens = self.login()
+        self.assertEqual(self.get_profile(tokens['access']).status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get_profile(tokens['access']).status_code, 401)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+
+    def test_revoke_token_blocks_one_jti(self):
+        first, second = self.login(), self.login()
+        revoke_token(AccessToken(first['access']))
+
+        self.assertEqual(self.get_profile(first['access']).status_code, 401)
+        self.assertEqual(self.get_profile(second['access']).status_code, 200)
+        self.assertEqual(self.refresh(first['refresh']).status_code, 200)
+
+    def test_legacy_token_uses_database(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.assertNotIn(PROFILE_ID_CLAIM, access)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_profile(access).status_code, 200)
+        self.assertTrue(any('FROM "auth_user"' in query['sql'] for query in queries))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_profile(access).status_code, 401)
+
+
+class CountingFetcher:
+    """
+    Stand-in for ``scraper.fetch_live_score`` that counts its calls and, if
+    given a ``release`` event, blocks until it is set.
+    """
+
+    def __init__(self, data, release=None):
+        self.data = data
+        self.release = release
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, team_1=None, team_2=None):
+        with self._lock:
+            self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return ScoreFetch(dict(self.data), True)
+
+    async def afetch(self, client, url, team_1=None, team_2=None):
+        return self(url, team_1, team_2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LiveScoreCacheTests(TestCase):
+    URL = 'https://scores.example.com/match/1'
+
+    def setUp(self):
+        cache.clear()
+        score_cache.stats.reset()
+        self.key = score_cache.cache_key(self.URL)
+
+    def publish_stale(self, data):
+        score_cache.publish(self.URL, data)
+        entry = cache.get(self.key)
+        cache.set(self.key, dict(entry, checked_at=entry['checked_at'] - 60))
+
+    def wait_for_version(self, version):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            entry = cache.get(self.key)
+            if entry is not None and entry['version'] >= version:
+                return entry
+            time.sleep(0.01)
+        self.fail(f'score was not refreshed to version {version}')
+
+    def test_stale_entry_refreshed_under_wsgi(self):
+        # The test client is a WSGI request: the async view runs on a loop
+        # that closes with the request, so the refresh must not live on it.
+        self.publish_stale({'score': '100/1'})
+        fetcher = CountingFetcher({'score': '104/1'})
+        with mock.patch('accounts.score_cache.fetch_live_score', fetcher):
+            response = self.client.get('/api/v1/live-score/', {'url': self.URL})
+            self.assertEqual(response.json(), {'score': '100/1'})
+            entry = self.wait_for_version(2)
+        self.assertEqual(entry['data'], {'score': '104/1'})
+        self.assertEqual(fetcher.calls, 1)
+
+    async def test_stale_entry_refreshed_on_long_lived_loop(self):
+        self.publish_stale({'score': '100/1'})
+        fetcher = CountingFetcher({'score': '104/1'})
+        with mock.patch('accounts.score_cache.async_scraper.fetch_live_score', fetcher.afetch):
+            self.assertEqual(await score_cache.aget_live_score_cached(self.URL), {'score': '100/1'})
+            await asyncio.gather(*score_cache._tasks.values())
+        entry = cache.get(self.key)
+        self.assertEqual((entry['version'], entry['data']), (2, {'score': '104/1'}))
+        self.assertEqual(fetcher.calls, 1)
+
+    def run_threads(self, count, target):
+        results = [None] * count
+
+        def call(i):
+            results[i] = target()
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_fresh_entry_is_not_fetched(self):
+        score_cache.publish(self.URL, {'score': '100/1'})
+        fetcher = CountingFetcher({'score': '104/1'})
+        with mock.patch('accounts.score_cache.fetch_live_score', fetcher):
+            self.assertEqual(score_cache.get_live_score_cached(self.URL), {'score': '100/1'})
+        self.assertEqual(fetcher.calls, 0)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        release = threading.Event()
+        fetcher = CountingFetcher({'score': '100/1'}, release)
+        with mock.patch('accounts.score_cache.fetch_live_score', fetcher):
+            threads, results = self.run_threads(10, lambda: score_cache.get_live_score_cached(self.URL))
+            # Let every thread reach the cache before the one fetch returns.
+            time.sleep(0.2)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(fetcher.calls, 1)
+        self.assertEqual(results, [{'score': '100/1'}] * 10)
+        snapshot = score_cache.stats.snapshot()
+        self.assertEqual((snapshot['misses'], snapshot['fetches']), (10, 1))
+
+    def test_stale_entry_served_while_one_refresh_runs(self):
+        self.publish_stale({'score': '100/1'})
+        release = threading.Event()
+        fetcher = CountingFetcher({'score': '104/1'}, release)
+        with mock.patch('accounts.score_cache.fetch_live_score', fetcher):
+            threads, results = self.run_threads(10, lambda: score_cache.get_live_score_cached(self.URL))
+            # Nobody waits for the refresh, which is still blocked.
+            for thread in threads:
+                thread.join(5)
+                self.assertFalse(thread.is_alive())
+            self.assertEqual(results, [{'score': '100/1'}] * 10)
+            release.set()
+            entry = self.wait_for_version(2)
+        self.assertEqual(entry['data'], {'score': '104/1'})
+        self.assertEqual(fetcher.calls, 1)
+        self.assertEqual(score_cache.stats.snapshot()['stale_hits'], 10)
+
+    async def test_concurrent_async_misses_share_one_fetch(self):
+        calls = []
+
+        async def afetch(client, url, team_1=None, team_2=None):
+            calls.append(url)
+            await asyncio.sleep(0.05)
+            return ScoreFetch({'score': '100/1'}, True)
+
+        with mock.patch('accounts.score_cache.async_scraper.fetch_live_score', afetch):
+            results = await asyncio.gather(*[score_cache.aget_live_score_cached(self.URL) for _ in range(10)])
+        self.assertEqual(results, [{'score': '100/1'}] * 10)
+        self.assertEqual(len(calls), 1)
+
+    def test_shared_client_closed_with_its_loop(self):
+        async def clients():
+            return await async_scraper.shared_client(), await async_scraper.shared_client()
+
+        first, again = asyncio.run(clients())
+        self.assertIs(first, again)
+        self.assertTrue(first.is_closed)
+        self.assertIsNot(asyncio.run(clients())[0], first)
+
+    def test_throttled_fetch_keeps_entry(self):
+        self.publish_stale({'score': '100/1'})
+        before = cache.get(self.key)
+        with mock.patch('accounts.score_cache.fetch_live_score', return_value=skipped_fetch(scrape_guard.THROTTLED)):
+            self.assertEqual(score_cache._refresh(self.key, self.URL, None, None), before)
+        self.assertEqual(cache.get(self.key), before)
+        self.assertNotIn('stale', before['data'])
+        self.assertEqual(score_cache.stats.snapshot()['fetches'], 0)
+
+    def test_unavailable_host_marks_entry_stale(self):
+        self.publish_stale({'score': '100/1'})
+        with mock.patch('accounts.score_cache.fetch_live_score', return_value=skipped_fetch(scrape_guard.UNAVAILABLE)):
+            entry = score_cache._refresh(self.key, self.URL, None, None)
+        self.assertEqual((entry['version'], entry['data']), (2, {'score': '100/1', 'stale': True}))
+        self.assertEqual(score_cache.stats.snapshot()['fetches'], 0)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class ScrapeGuardTests(TestCase):
+    """
+    Breaker and token bucket, on a fake clock and with the jitter pinned to
+    its upper bound.
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for patcher in (
+            mock.patch('accounts.scrape_guard.time', self.clock),
+            mock.patch('accounts.scrape_guard.random.uniform', side_effect=lambda low, high: high),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.guard = scrape_guard.HostGuard('scores.example.com')
+
+    def fail_requests(self, times=1):
+        for _ in range(times):
+            self.assertEqual(self.guard.acquire(), scrape_guard.ALLOWED)
+            self.guard.record_failure()
+
+    def test_opens_after_threshold(self):
+        self.fail_requests(scrape_guard.FAILURE_THRESHOLD - 1)
+        self.assertEqual(self.guard.state, scrape_guard.CLOSED)
+        self.fail_requests()
+        self.assertEqual(self.guard.state, scrape_guard.OPEN)
+        self.assertEqual(self.guard.acquire(), scrape_guard.UNAVAILABLE)
+        self.assertEqual(self.guard.snapshot()['open_for'], scrape_guard.BASE_OPEN_SECONDS)
+
+    def test_success_resets_failures(self):
+        self.fail_requests(scrape_guard.FAILURE_THRESHOLD - 1)
+        self.guard.record_response(200)
+        self.fail_requests(scrape_guard.FAILURE_THRESHOLD - 1)
+        self.assertEqual(self.guard.state, scrape_guard.CLOSED)
+
+    def test_half_open_lets_one_probe_through(self):
+        self.fail_requests(scrape_guard.FAILURE_THRESHOLD)
+        self.clock.now += scrape_guard.BASE_OPEN_SECONDS
+        self.assertEqual(self.guard.acquire(), scrape_guard.ALLOWED)
+        self.assertEqual(self.guard.state, scrape_guard.HALF_OPEN)
+        self.assertEqual(self.guard.acquire(), scrape_guard.UNAVAILABLE)
+        # A probe that never reports back stops blocking after a while.
+        self.clock.now += scrape_guard.PROBE_SECONDS
+        self.assertEqual(self.guard.acquire(), scrape_guard.ALLOWED)
+        self.guard.record_response(200)
+        self.assertEqual(self.guard.state, scrape_guard.CLOSED)
+        self.assertEqual(self.guard.acquire(), scrape_guard.ALLOWED)
+
+    def test_failed_probe_backs_off(self):
+        self.fail_requests(scrape_guard.FAILURE_THRESHOLD)
+        for trips in range(2, 10):
+            self.clock.now = self.guard.open_until
+            self.guard.bucket.tokens = scrape_guard.BURST
+            self.fail_requests()
+            expected = min(scrape_guard.MAX_OPEN_SECONDS, scrape_guard.BASE_OPEN_SECONDS * 2 ** (trips - 1))
+            self.assertEqual(self.guard.open_until - self.clock.now, expected)
+        self.assertEqual(expected, scrape_guard.MAX_OPEN_SECONDS)
+
+    def test_retry_after_opens_at_once(self):
+        self.assertEqual(self.guard.acquire(), scrape_guard.ALLOWED)
+        self.guard.record_response(429, '60')
+        self.assertEqual(self.guard.state, scrape_guard.OPEN)
+        self.assertEqual(self.guard.open_until - self.clock.now, 60)
+        self.assertEqual(self.guard.acquire(), scrape_guard.UNAVAILABLE)
+
+    def test_page_errors_do_not_count(self):
+        for _ in range(scrape_guard.FAILURE_THRESHOLD + 1):
+            self.guard.acquire()
+            self.guard.record_response(404)
+        self.assertEqual(self.guard.state, scrape_guard.CLOSED)
+
+    def test_bucket_runs_out(self):
+        for _ in range(scrape_guard.BURST):
+            self.assertEqual(self.guard.acquire(), scrape_guard.ALLOWED)
+        self.assertEqual(self.guard.acquire(), scrape_guard.THROTTLED)
+        # Throttling is not a failure.
+        self.assertEqual(self.guard.state, scrape_guard.CLOSED)
+        self.clock.now += 1 / scrape_guard.RATE_PER_SECOND
+        self.assertEqual(self.guard.acquire(), scrape_guard.ALLOWED)
+        self.assertEqual(self.guard.acquire(), scrape_guard.THROTTLED)
+
+    def test_throttled_fetch_sends_nothing(self):
+        with mock.patch('accounts.scraper.guard_for', return_value=self.guard), \
+                mock.patch('accounts.scraper._session') as session:
+            self.guard.bucket.tokens = 0
+            result = scraper.fetch_live_score('https://scores.example.com/match/1')
+        session.get.assert_not_called()
+        self.assertTrue(result.throttled)
+        self.assertEqual(result.data, RATE_LIMITED)
+
+
+class StopWorker(Exception):
+    pass
+
+
+class IngestScoresWorkerTests(TestCase):
+    """
+    The ``ingest_scores`` loop logs a failing round and carries on.
+    """
+    MATCH = SimpleNamespace(id=1, url='https://scores.example.com/match/1', Team1='IND', Team2='AUS')
+
+    def run_worker(self, rounds, active_matches, ingest):
+        sleeps = []
+
+        async def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == rounds:
+                raise StopWorker
+
+        command = 'accounts.management.commands.ingest_scores'
+        with mock.patch(f'{command}.asyncio.sleep', sleep), \
+                mock.patch(f'{command}.Command.active_matches', side_effect=active_matches), \
+                mock.patch(f'{command}.Command.ingest', side_effect=ingest) as ingest_mock, \
+                self.assertLogs(command, 'ERROR') as logs, \
+                self.assertRaises(StopWorker):
+            call_command('ingest_scores', interval=1, reload=0, stdout=StringIO())
+        return ingest_mock, logs
+
+    def test_survives_failing_match_query(self):
+        ingest, logs = self.run_worker(2, [RuntimeError('database is locked'), [self.MATCH]], lambda *args: None)
+        self.assertEqual(ingest.call_count, 1)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('database is locked', logs.output[0])
+
+    def test_survives_failing_ingest(self):
+        ingest, logs = self.run_worker(2, lambda: [self.MATCH], [ConnectionError('cache down'), None])
+        # The match was still due and is scraped again.
+        self.assertEqual(ingest.call_count, 2)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('cache down', logs.output[0])
+
+
+class OutcomeEngineTests(TestCase):
+    """
+    Run against the stdlib engine and, when NumPy is installed, the NumPy one.
+    """
+
+    def engines(self, seed=None):
+        engines = [OutcomeEngine(seed=seed, use_numpy=False, batch_size=64)]
+        if np is not None:
+            engines.append(OutcomeEngine(seed=seed, use_numpy=True, batch_size=64))
+        return engines
+
+    def test_mine_tiles_distinct_and_in_range(self):
+        for engine in self.engines():
+            for mines in range(1, GRID_SIZE):
+                with self.subTest(numpy=engine.use_numpy, mines=mines):
+                    for _ in range(20):
+                        tiles = engine.mine_tiles(mines)
+                        self.assertEqual(len(set(tiles)), mines)
+                        self.assertTrue(all(0 <= tile < GRID_SIZE for tile in tiles))
+                        self.assertEqual(len(tiles_from_mask(engine.mine_mask(mines))), mines)
+
+    @skipUnless(np is not None, "NumPy is not installed.")
+    def test_mine_mask_array(self):
+        engine = OutcomeEngine(use_numpy=True)
+        for mines in (1, 3, 24):
+            masks = engine.mine_mask_array(500, mines).tolist()
+            self.assertTrue(all(mask.bit_count() == mines and mask < 1 << GRID_SIZE for mask in masks))
+
+    def test_draws_in_range(self):
+        for engine in self.engines():
+            with self.subTest(numpy=engine.use_numpy):
+                rolls = engine.dice_batch(1000) + [engine.roll_dice() for _ in range(200)]
+                self.assertTrue(all(len(roll) == 2 and 1 <= min(roll) <= max(roll) <= 6 for roll in rolls))
+                self.assertEqual(set(roll[0] for roll in rolls), set(range(1, 7)))
+                flips = engine.coin_batch(1000) + [engine.flip_coin() for _ in range(200)]
+                self.assertEqual(set(flips), {0, 1})
+                self.assertEqual(engine.coin_batch(0), [])
+
+    def test_same_seed_same_outcomes(self):
+        def draw(engine):
+            return (
+                engine.dice_batch(50), engine.coin_batch(50), [engine.roll_dice() for _ in range(100)],
+                [engine.flip_coin() for _ in range(100)], [engine.mine_tiles(5) for _ in range(10)],
+            )
+
+        for first, second, other in zip(self.engines(seed=42), self.engines(seed=42), self.engines(seed=43)):
+            with self.subTest(numpy=first.use_numpy):
+                outcomes = draw(first)
+                self.assertEqual(draw(second), outcomes)
+                self.assertNotEqual(draw(other), outcomes)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReplicaRoutingTests(TestCase):
+    """
+    Which alias reads go to, during and after requests, with a ``replica``
+    alias configured. The router only names aliases, so no replica
+    connection is opened.
+    """
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.dict(settings.DATABASES, {db_router.REPLICA: dict(settings.DATABASES['default'])})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = db_router.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def request(self, method, user_id=None):
+        headers = {}
+        if user_id is not None:
+            token = AccessToken()
+            token['user_id'] = user_id
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        return getattr(self.factory, method.lower())('/api/v1/user-profile/', **headers)
+
+    def reads_during(self, request, view=None):
+        """
+        The alias each read in ``view`` was routed to.
+        """
+        reads = []
+
+        def get_response(request):
+            reads.append(self.router.db_for_read(UserProfile))
+            if view is not None:
+                view(reads)
+            return HttpResponse()
+
+        db_router.ReplicaRoutingMiddleware(get_response)(request)
+        return reads
+
+    def test_outside_requests_reads_use_primary(self):
+        self.assertEqual(self.router.db_for_read(UserProfile), db_router.PRIMARY)
+        self.assertEqual(self.router.db_for_write(UserProfile), db_router.PRIMARY)
+
+    def test_safe_methods_read_from_replica(self):
+        for method in db_router.SAFE_METHODS:
+            with self.subTest(method=method):
+                self.assertEqual(self.reads_during(self.request(method, user_id=1)), [db_router.REPLICA])
+        # The mark does not outlive the request.
+        self.assertEqual(self.router.db_for_read(UserProfile), db_router.PRIMARY)
+
+    def test_writes_stay_on_primary(self):
+        self.assertEqual(self.reads_during(self.request('POST', user_id=1)), [db_router.PRIMARY])
+
+    def test_write_mid_request_pins_rest_of_request(self):
+        def view(reads):
+            self.assertEqual(self.router.db_for_write(UserProfile), db_router.PRIMARY)
+            reads.append(self.router.db_for_read(UserProfile))
+
+        self.assertEqual(self.reads_during(self.request('GET'), view), [db_router.REPLICA, db_router.PRIMARY])
+        self.assertEqual(self.reads_during(self.request('GET')), [db_router.REPLICA])
+
+    def test_reads_after_a_write_request_stay_on_primary(self):
+        self.reads_during(self.request('POST', user_id=1))
+        self.assertEqual(self.reads_during(self.request('GET', user_id=1)), [db_router.PRIMARY])
+        # Other users and anonymous requests are not pinned.
+        self.assertEqual(self.reads_during(self.request('GET', user_id=2)), [db_router.REPLICA])
+        self.assertEqual(self.reads_during(self.request('GET')), [db_router.REPLICA])
+        # The pin expires.
+        cache.delete(db_router._pin_key(1))
+        self.assertEqual(self.reads_during(self.request('GET', user_id=1)), [db_router.REPLICA])
+
+    def test_mark_reset_when_view_raises(self):
+        def view(reads):
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            self.reads_during(self.request('GET'), view)
+        self.assertEqual(self.router.db_for_read(UserProfile), db_router.PRIMARY)
+
+    def test_no_replica_configured(self):
+        del settings.DATABASES[db_router.REPLICA]
+        self.assertEqual(self.reads_during(self.request('GET')), [db_router.PRIMARY])
+
+    async def test_async_requests(self):
+        reads = []
+
+        async def get_response(request):
+            reads.append(self.router.db_for_read(UserProfile))
+            return HttpResponse()
+
+        middleware = db_router.ReplicaRoutingMiddleware(get_response)
+        await middleware(self.request('GET', user_id=1))
+        await middleware(self.request('POST', user_id=1))
+        await middleware(self.request('GET', user_id=1))
+        self.assertEqual(reads, [db_router.REPLICA, db_router.PRIMARY, db_router.PRIMARY])
+        self.assertEqual(self.router.db_for_read(UserProfile), db_router.PRIMARY)
+
+
+def create_match(match_id, status='UpComing'):
+    return Matchess.objects.create(
+        match_id=match_id, match_name=f'Match {match_id}', Team1='A', Team2='B', match_status=status,
+        date=datetime.date(2026, 1, match_id), time=datetime.time(10), img='a.png', url=f'https://example.com/{match_id}',
+    )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MatchListConditionalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player', 'player@example.com', 'secret-pass')
+        create_match(1)
+        create_match(2, status='Active')
+
+    def setUp(self):
+        cache.clear()
+        self.client = api_client(self.user)
+        self.first = self.client.get('/api/v1/matches/')
+
+    def test_validators(self):
+        self.assertEqual(self.first.status_code, 200)
+        self.assertEqual([match['match_name'] for match in self.first.data], ['Match 1', 'Match 2'])
+        self.assertTrue(self.first['ETag'])
+        self.assertTrue(self.first['Last-Modified'])
+        self.assertEqual(self.first['Cache-Control'], 'private, no-cache')
+
+    def test_if_none_match(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/matches/', HTTP_IF_NONE_MATCH=self.first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], self.first['ETag'])
+
+        response = self.client.get('/api/v1/matches/', HTTP_IF_NONE_MATCH='"something-else"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        response = self.client.get('/api/v1/matches/', HTTP_IF_MODIFIED_SINCE=self.first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        earlier = http_date(parse_http_date(self.first['Last-Modified']) - 60)
+        response = self.client.get('/api/v1/matches/', HTTP_IF_MODIFIED_SINCE=earlier)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_filters_have_their_own_etag(self):
+        response = self.client.get('/api/v1/matches/', {'status': 'Active'}, HTTP_IF_NONE_MATCH=self.first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([match['match_name'] for match in response.data], ['Match 2'])
+        self.assertNotEqual(response['ETag'], self.first['ETag'])
+
+    def test_list_served_from_cache(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/matches/')
+        self.assertEqual(response.data, self.first.data)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MatchListInvalidationTests(TransactionTestCase):
+    """
+    Invalidation runs on commit, which only a TransactionTestCase sees.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = api_client(User.objects.create_user('player', 'player@example.com', 'secret-pass'))
+        self.match = create_match(1)
+        self.first = self.client.get('/api/v1/matches/')
+
+    def assert_changed(self):
+        response = self.client.get('/api/v1/matches/', HTTP_IF_NONE_MATCH=self.first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.first['ETag'])
+        return response.data
+
+    def test_saved_match(self):
+        with transaction.atomic():
+            self.match.match_status = 'Active'
+            self.match.save()
+            # Not before the commit.
+            self.assertEqual(
+                self.client.get('/api/v1/matches/', HTTP_IF_NONE_MATCH=self.first['ETag']).status_code, 304,
+            )
+        self.assertEqual([match['match_status'] for match in self.assert_changed()], ['Active'])
+
+    def test_added_and_deleted_match(self):
+        create_match(2)
+        self.assertEqual(len(self.assert_changed()), 2)
+        self.first = self.client.get('/api/v1/matches/')
+        self.match.delete()
+        self.assertEqual([match['match_name'] for match in self.assert_changed()], ['Match 2'])
+
+
+class SimulateCasinoTests(TestCase):
+    """
+    ``simulate_casino --fast`` as run in CI: every payout table must return
+    what its exact RTP says, and never more than the stake.
+    """
+
+    def simulate(self, *args):
+        out = StringIO()
+        call_command('simulate_casino', '--fast', '--seed', '1', *args, stdout=out)
+        rows = [line.split() for line in out.getvalue().splitlines()[1:] if not line.startswith('NumPy')]
+        # strategy words, rounds, rtp, exact, z, variance, drawdown, rounds/s
+        return {' '.join(row[:-7]): (float(row[-6]), float(row[-5]), float(row[-4])) for row in rows}
+
+    def test_rtp_within_tolerance(self):
+        results = self.simulate()
+        self.assertEqual(len(results), 9)
+        for strategy, (rtp, exact, z) in results.items():
+            with self.subTest(strategy=strategy):
+                self.assertLessEqual(abs(z), 5.0)
+                self.assertLessEqual(exact, 1.0)
+
+    def test_table_change_is_caught(self):
+        # The simulated game pays 3x under 7 while the exact RTP still uses 2x.
+        tables = dict(DICE_MULTIPLIERS, under=tuple(3 if m else 0 for m in DICE_MULTIPLIERS['under']))
+        with mock.patch('accounts.management.commands.simulate_casino.DICE_MULTIPLIERS', tables):
+            with self.assertRaisesMessage(CommandError, 'dice under'):
+                self.simulate('--game', 'dice')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class WithdrawalRequestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player', 'player@example.com', 'secret-pass')
+        cls.profile = cls.user.profile
+        cls.profile.balance = Decimal('100.00')
+        cls.profile.save()
+
+    def setUp(self):
+        cache.clear()
+        self.client = api_client(self.user)
+        OTP.objects.create(user=self.user, code='123456', expires_at=timezone.now() + datetime.timedelta(minutes=5))
+
+    def request(self, amount):
+        return self.client.post('/api/v1/withdraw/request/', {'otp': '123456', 'amount': amount})
+
+    def pending(self):
+        return UserStats.objects.filter(user_profile=self.profile).values_list('pending_withdrawals', flat=True).first()
+
+    def test_request(self):
+        self.assertEqual(self.request('40').status_code, 201)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, Decimal('60.00'))
+        self.assertEqual(WithdrawalRequest.objects.get().amount, Decimal('40.00'))
+        self.assertEqual(self.pending(), Decimal('40.00'))
+        self.assertFalse(OTP.objects.exists())
+
+    def test_insufficient_funds(self):
+        self.assertEqual(self.request('100.01').status_code, 400)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, Decimal('100.00'))
+        self.assertFalse(WithdrawalRequest.objects.exists())
+
+    def test_failure_rolls_everything_back(self):
+        with mock.patch('accounts.stats.record_withdrawal_requested', side_effect=RuntimeError('rollup failed')):
+            self.assertEqual(self.request('40').status_code, 500)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, Decimal('100.00'))
+        self.assertFalse(WithdrawalRequest.objects.exists())
+        self.assertIsNone(self.pending())
+        # The OTP was not used up.
+        self.assertEqual(self.request('40').status_code, 201)
 
-# Create your tests here.
@@ -2,10 +2,12 @@
 
 from django.contrib.auth.models import User
 from rest_framework import generics, status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.db.models import F, Sum
+import abc
 import random
 import decimal
 from django.utils import timezone
@@ -15,31 +17,41 @@ from decimal import Decimal
 from django.db import transaction # Import transaction module
 # from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
-from .scraper import get_live_score
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+import asyncio
+import json
+from .score_cache import aget_live_score_cached, aget_snapshot, get_snapshots, stats as score_cache_stats
+from .score_stream import get_broadcaster
 
 # Import all necessary models and serializers
 from .models import (
-    UserProfile, DepositRequest, WithdrawalRequest, Contact, CasinoBet,OTP,Transaction,Matchess
+    UserProfile, DepositRequest, WithdrawalRequest, Contact, CasinoBet,OTP,Transaction,Matchess,
+    UserStats, UserGameDailyStats
 )
 from .serializers import UserSerializer, TransactionSerializer,MatchessSerializer
+from .wallet import InsufficientFunds, play_autobet, settle_instant_bet
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, history_response
+from . import match_cache, score_history, scrape_guard
+from .balance_cache import get_balance as get_cached_balance
+from .stats import record_bet_winnings
+from .authentication import aauthenticate
+from .game_state import GRID_SIZE, MinesGame, get_store as get_game_store, tiles_from_mask
+from .casino_engine import get_engine
+from .games import COIN_SIDES, DICE_CHOICES, flip_coin, roll_dice
+from .mines import multiplier as mines_multiplier, payout as mines_payout
 
 # --- HELPER FUNCTIONS ---
 
-def create_casino_bet_and_transactions(user_profile, game_name, bet_amount, winnings):
+def request_history_item(req):
     """
-    Create a CasinoBet record. Transactions will be auto-created by the signal.
+    Deposit/withdrawal history row from a ``.values()`` dict.
     """
-    multiplier = 0
-    if bet_amount > 0:
-        multiplier = decimal.Decimal(winnings) / decimal.Decimal(bet_amount)
-
-    CasinoBet.objects.create(
-        user_profile=user_profile,
-        game_name=game_name,
-        bet_amount=bet_amount,
-        winnings=winnings,
-        multiplier=multiplier
-    )
+    return {'id': req['id'], 'amount': req['amount'], 'status': req['status'], 'created_at': timezone.localtime(req['timestamp']).strftime('%d %b %Y, %I:%M %p'), 'transaction_id': req['otp_provided']}
 
 # --- CORE VIEWS ---
 
@@ -60,25 +72,66 @@ class GenerateOTPView(APIView):
         user = request.user
         otp_code = random.randint(100000, 999999)
         expiration_time = timezone.now() + timedelta(minutes=5)
-        OTP.objects.filter(user=user).delete()
-        OTP.objects.create(user=user, code=str(otp_code), expires_at=expiration_time)
+        OTP.objects.filter(user_id=user.id).delete()
+        OTP.objects.create(user_id=user.id, code=str(otp_code), expires_at=expiration_time)
         return Response({'message': 'OTP generated.', 'otp': otp_code}, status=status.HTTP_200_OK)
 
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        profile = UserProfile.objects.get(user=request.user)
-        return Response({'username': request.user.username, 'balance': profile.balance})
+        # Polled constantly by the header; served from the balance cache. A
+        # miss reads the primary, since the cached value outlives replica lag.
+        balance = get_cached_balance(request.user.id, lambda: UserProfile.objects.using('default').values_list(
+            'balance', flat=True
+        ).get(user_id=request.user.id))
+        return Response({'username': request.user.username, 'balance': balance})
 
 class UserExposureView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        user_profile = request.user.profile
-        total_exposure = WithdrawalRequest.objects.filter(
-            user_profile=user_profile, status='pending'
-        ).aggregate(total=Sum('amount'))['total'] or 0.00
+        # Kept in UserStats by the WithdrawalRequest signals.
+        total_exposure = UserStats.objects.filter(
+            user_profile=request.user.profile
+        ).values_list('pending_withdrawals', flat=True).first() or 0.00
         return Response({'exposure': total_exposure})
 
+class UserStatsView(APIView):
+    """
+    Lifetime totals and per-game totals over the last ``?days=`` (default 30,
+    max 365), read from the stats rollups.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_DAYS = 365
+
+    def get(self, request):
+        try:
+            days = max(1, min(int(request.query_params.get('days', 30)), self.MAX_DAYS))
+        except ValueError:
+            return Response({'error': 'days must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        totals = UserStats.objects.filter(user_profile=request.user.profile).first() or UserStats()
+        since = timezone.localdate() - timedelta(days=days - 1)
+        games = (
+            UserGameDailyStats.objects
+            .filter(user_profile=request.user.profile, day__gte=since)
+            .values('game_name')
+            .annotate(bets=Sum('bets'), wagered=Sum('wagered'), won=Sum('won'))
+            .order_by('game_name')
+        )
+        return Response({
+            'lifetime': {
+                'bets': totals.bets,
+                'wagered': totals.wagered,
+                'won': totals.won,
+                'net': totals.net,
+                'deposited': totals.deposited,
+                'withdrawn': totals.withdrawn,
+                'exposure': totals.pending_withdrawals,
+            },
+            'days': days,
+            'games': [{**game, 'net': game['won'] - game['wagered']} for game in games],
+        })
+
 class ProtectedView(APIView):
     permission_classes=[IsAuthenticated]
     def get(self,request):
@@ -91,7 +144,7 @@ class VerifyOtpAndCreateRequestView(APIView):
     def post(self, request):
         user, otp_code, amount = request.user, request.data.get('otp'), request.data.get('amount')
         try:
-            otp_instance = OTP.objects.get(user=user, code=otp_code)
+            otp_instance = OTP.objects.get(user_id=user.id, code=otp_code)
             if otp_instance.expires_at < timezone.now():
                 otp_instance.delete()
                 return Response({'error': 'OTP has expired.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -126,9 +179,8 @@ class RejectDepositView(APIView):
 class DepositHistoryView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        requests = DepositRequest.objects.filter(user_profile=request.user.profile).order_by('-timestamp')
-        data = [{'id': req.id, 'amount': req.amount, 'status': req.status, 'created_at': timezone.localtime(req.timestamp).strftime('%d %b %Y, %I:%M %p'), 'transaction_id': req.otp_provided} for req in requests]
-        return Response(data)
+        requests = DepositRequest.objects.filter(user_profile=request.user.profile)
+        return history_response(request, requests, ['amount', 'status', 'otp_provided'], request_history_item, 'deposits')
 
 # --- WITHDRAWAL WORKFLOW ---
 
@@ -137,7 +189,7 @@ class CreateWithdrawalRequestView(APIView):
     def post(self, request):
         user, otp_code, amount = request.user, request.data.get('otp'), request.data.get('amount')
         try:
-            otp_instance = OTP.objects.get(user=user, code=otp_code)
+            otp_instance = OTP.objects.get(user_id=user.id, code=otp_code)
             if otp_instance.expires_at < timezone.now():
                 otp_instance.delete()
                 return Response({'error': 'OTP has expired.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -145,17 +197,19 @@ class CreateWithdrawalRequestView(APIView):
             return Response({'error': 'Invalid OTP.'}, status=status.HTTP_400_BAD_REQUEST)
         try:
             amount_decimal = decimal.Decimal(amount)
-            profile = user.profile
             if amount_decimal <= 0: raise ValueError("Amount must be positive.")
-            if profile.balance < amount_decimal:
-                return Response({'error': 'Insufficient funds.'}, status=status.HTTP_400_BAD_REQUEST)
-            profile.balance = F('balance') - amount_decimal
-            profile.save()
-            WithdrawalRequest.objects.create(
-                user_profile=profile, amount=amount_decimal,
-                status='pending', otp_provided=otp_code
-            )
-            otp_instance.delete()
+            # Debit, request (and its rollup) and OTP use in one transaction.
+            with transaction.atomic():
+                profile = UserProfile.objects.select_for_update().get(user_id=user.id)
+                if profile.balance < amount_decimal:
+                    return Response({'error': 'Insufficient funds.'}, status=status.HTTP_400_BAD_REQUEST)
+                profile.balance = F('balance') - amount_decimal
+                profile.save()
+                WithdrawalRequest.objects.create(
+                    user_profile=profile, amount=amount_decimal,
+                    status='pending', otp_provided=otp_code
+                )
+                otp_instance.delete()
             return Response({'message': 'Withdrawal request sent successfully.'}, status=status.HTTP_201_CREATED)
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
@@ -178,9 +232,8 @@ class RejectWithdrawalView(APIView):
 class WithdrawalHistoryView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        requests = WithdrawalRequest.objects.filter(user_profile=request.user.profile).order_by('-timestamp')
-        data = [{'id': req.id, 'amount': req.amount, 'status': req.status, 'created_at': timezone.localtime(req.timestamp).strftime('%d %b %Y, %I:%M %p'), 'transaction_id': req.otp_provided} for req in requests]
-        return Response(data)
+        requests = WithdrawalRequest.objects.filter(user_profile=request.user.profile)
+        return history_response(request, requests, ['amount', 'status', 'otp_provided'], request_history_item, 'withdrawals')
 
 # --- SPORTS BETTING ---
 
@@ -193,7 +246,7 @@ class WithdrawalHistoryView(APIView):
 class MinesBetView(APIView):
     """
     Handles the initial bet for a game of Mines.
-    Deducts the bet amount and creates the game grid in the user's session.
+    Deducts the bet amount and stores the new game in the Mines game store.
     """
     permission_classes = [IsAuthenticated]
 
@@ -211,7 +264,7 @@ class MinesBetView(APIView):
             # Use a transaction to ensure balance deduction and bet creation are atomic
             with transaction.atomic():
                 # Lock the user's profile to prevent race conditions
-                user_profile = UserProfile.objects.select_for_update().get(user=request.user)
+                user_profile = UserProfile.objects.select_for_update().get(user_id=request.user.id)
 
                 if user_profile.balance < bet_amount:
                     return Response({'error': 'Insufficient funds.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -229,22 +282,15 @@ class MinesBetView(APIView):
                     multiplier=0
                 )
 
-            # 3. Prepare the game grid
-            grid = [{'id': i, 'isMine': False, 'isRevealed': False} for i in range(25)]
-            mines_placed = 0
-            while mines_placed < num_mines:
-                index = random.randint(0, 24)
-                if not grid[index]['isMine']:
-                    grid[index]['isMine'] = True
-                    mines_placed += 1
-
-            # 4. Store game state in the session
-            request.session['mines_game'] = {
-                'bet_id': casino_bet.id,
-                'grid': grid,
-            }
+            # 3. Place the mines and store the game (not in the session)
+            get_game_store().start(MinesGame(
+                bet_id=casino_bet.id,
+                user_id=request.user.id,
+                mine_mask=get_engine().mine_mask(num_mines),
+            ))
 
-            return Response({'grid': grid}, status=status.HTTP_200_OK)
+            # Mine positions stay on the server until the game ends.
+            return Response({'bet_id': casino_bet.id, 'mines': num_mines, 'grid_size': GRID_SIZE}, status=status.HTTP_200_OK)
 
         except (ValueError, TypeError, Decimal.InvalidOperation):
             return Response({'error': 'Invalid input data.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -253,52 +299,101 @@ class MinesBetView(APIView):
             return Response({'error': 'An unexpected server error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class MinesRevealView(APIView):
+    """
+    Reveals one tile of the active Mines game. Checked against the stored
+    mine mask; nothing is written to the database. Hitting a mine ends the
+    game (the stake was taken when the bet was placed).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            tile = int(request.data.get('tile'))
+        except (TypeError, ValueError):
+            return Response({'error': 'Invalid tile.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= tile < GRID_SIZE:
+            return Response({'error': f'Tile must be between 0 and {GRID_SIZE - 1}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        store = get_game_store()
+        game = store.active_for(request.user.id)
+        if not game:
+            return Response({'error': 'No active Mines game found.'}, status=status.HTTP_400_BAD_REQUEST)
+        if game.is_revealed(tile):
+            return Response({'error': 'Tile already revealed.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if game.is_mine(tile):
+            if not store.finish(game):
+                return Response({'error': 'No active Mines game found.'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({
+                'outcome': 'mine',
+                'multiplier': 0,
+                'mine_tiles': tiles_from_mask(game.mine_mask),
+            }, status=status.HTTP_200_OK)
+
+        game.revealed_mask |= 1 << tile
+        store.save(game)
+        return Response({
+            'outcome': 'gem',
+            'safe_reveals': game.safe_reveals,
+            'multiplier': mines_multiplier(game.mines, game.safe_reveals),
+        }, status=status.HTTP_200_OK)
+
+
 class MinesCashOutView(APIView):
     """
     Handles the cashout process for an active Mines game.
-    Updates the CasinoBet record and adds winnings to the user's balance.
+    Winnings come from the multiplier table for the game's mines and safe
+    reveals; the bet record and the user's balance are updated with them.
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        game_session = request.session.get('mines_game')
-        if not game_session:
+        store = get_game_store()
+        game = store.active_for(request.user.id)
+        if not game:
             return Response({'error': 'No active Mines game found.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            bet_id = game_session['bet_id']
-            winnings = Decimal(request.data.get('winnings', '0'))
+        if game.safe_reveals == 0:
+            return Response({'error': 'Reveal at least one tile before cashing out.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            if winnings <= 0:
-                 return Response({'error': 'Invalid winnings amount.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            bet_id = game.bet_id
 
             # Use a transaction for updating the bet and the user's balance
             with transaction.atomic():
                 # Lock the user profile to prevent race conditions
-                user_profile = UserProfile.objects.select_for_update().get(user=request.user)
+                user_profile = UserProfile.objects.select_for_update().get(user_id=request.user.id)
                 
                 # Get the original bet record to update it
                 bet = get_object_or_404(CasinoBet, id=bet_id, user_profile=user_profile)
+
+                # End the game first; a concurrent cashout of it gets nothing.
+                if not store.finish(game):
+                    return Response({'error': 'No active Mines game found.'}, status=status.HTTP_400_BAD_REQUEST)
                 
                 # 1. Update the bet record with final winnings and multiplier
+                multiplier = mines_multiplier(game.mines, game.safe_reveals)
+                winnings = mines_payout(bet.bet_amount, game.mines, game.safe_reveals)
+                record_bet_winnings(bet, winnings - bet.winnings)
                 bet.winnings = winnings
-                bet.multiplier = (winnings / bet.bet_amount if bet.bet_amount > 0 else 0)
+                bet.multiplier = multiplier
                 bet.save()
 
                 # 2. Add winnings to the user's balance
                 user_profile.balance += winnings
                 user_profile.save()
 
-            # 3. Clear the game from the session after a successful transaction
-            del request.session['mines_game']
-
             return Response({
                 'message': 'Cashed out successfully!',
+                'multiplier': multiplier,
+                'winnings': winnings,
+                'mine_tiles': tiles_from_mask(game.mine_mask),
                 'new_balance': f'{user_profile.balance:.2f}'
             }, status=status.HTTP_200_OK)
         
         except (KeyError, ValueError, Decimal.InvalidOperation):
-            return Response({'error': 'Invalid session or winnings data.'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'error': 'Invalid game data.'}, status=status.HTTP_400_BAD_REQUEST)
         except CasinoBet.DoesNotExist:
              return Response({'error': 'Bet record not found.'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -307,16 +402,17 @@ class MinesCashOutView(APIView):
 
 class MinesLossView(APIView):
     """
-    Handles the end of a Mines game when a user hits a mine.
-    This view simply clears the session, as the bet amount was already deducted.
+    Ends the active Mines game without a payout. The reveal endpoint already
+    ends the game when a mine is hit; this lets the player abandon a game.
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        if 'mines_game' in request.session:
+        store = get_game_store()
+        game = store.active_for(request.user.id)
+        if game and store.finish(game):
             # The bet record already exists with winnings=0, so we just need
-            # to clear the session to end the game.
-            del request.session['mines_game']
+            # to end the game.
             return Response({'message': 'Game loss recorded.'}, status=status.HTTP_200_OK)
         
         return Response({'error': 'No active game to lose.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -327,24 +423,18 @@ class DiceBetView(APIView):
         amount, choice, user_profile = request.data.get('amount'), request.data.get('choice'), request.user.profile
         try:
             amount_decimal = decimal.Decimal(amount)
-            if user_profile.balance < amount_decimal:
-                return Response({'error': 'Insufficient funds.'}, status=status.HTTP_400_BAD_REQUEST)
-            user_profile.balance = F('balance') - amount_decimal
-            user_profile.save()
-            user_profile.refresh_from_db()
-            die1, die2 = random.randint(1, 6), random.randint(1, 6)
-            roll_sum = die1 + die2
-            win, payout_multiplier = False, 0
-            if choice == 'under' and roll_sum < 7: win, payout_multiplier = True, 2
-            elif choice == 'over' and roll_sum > 7: win, payout_multiplier = True, 2
-            elif choice == '7' and roll_sum == 7: win, payout_multiplier = True, 5
-            winnings = 0
-            if win:
-                winnings = amount_decimal * payout_multiplier
-                user_profile.balance = F('balance') + winnings
-                user_profile.save()
-            create_casino_bet_and_transactions(user_profile, 'Dice', amount_decimal, winnings)
+            if amount_decimal <= 0:
+                return Response({'error': 'Invalid bet amount.'}, status=status.HTTP_400_BAD_REQUEST)
+            die1, die2, payout_multiplier = roll_dice(choice)
+            win = payout_multiplier > 0
+            winnings = amount_decimal * payout_multiplier
+            # Debit, payout and bet record in one atomic step.
+            settle_instant_bet(user_profile, 'Dice', amount_decimal, winnings)
             return Response({'final_die1': die1, 'final_die2': die2, 'outcome': 'win' if win else 'loss', 'winnings': winnings}, status=status.HTTP_200_OK)
+        except InsufficientFunds:
+            return Response({'error': 'Insufficient funds.'}, status=status.HTTP_400_BAD_REQUEST)
+        except (TypeError, decimal.InvalidOperation):
+            return Response({'error': 'Invalid bet amount.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -354,23 +444,92 @@ class CoinFlipBetView(APIView):
         amount, choice, user_profile = request.data.get('amount'), request.data.get('choice'), request.user.profile
         try:
             amount_decimal = decimal.Decimal(amount)
-            if user_profile.balance < amount_decimal:
-                return Response({'error': 'Insufficient funds.'}, status=status.HTTP_400_BAD_REQUEST)
-            user_profile.balance = F('balance') - amount_decimal
-            user_profile.save()
-            user_profile.refresh_from_db()
-            outcome = random.choice(['heads', 'tails'])
-            win = (choice == outcome)
-            winnings = 0
-            if win:
-                winnings = amount_decimal * 2
-                user_profile.balance = F('balance') + winnings
-                user_profile.save()
-            create_casino_bet_and_transactions(user_profile, 'Coin Flip', amount_decimal, winnings)
+            if amount_decimal <= 0:
+                return Response({'error': 'Invalid bet amount.'}, status=status.HTTP_400_BAD_REQUEST)
+            outcome, payout_multiplier = flip_coin(choice)
+            winnings = amount_decimal * payout_multiplier
+            # Debit, payout and bet record in one atomic step.
+            settle_instant_bet(user_profile, 'Coin Flip', amount_decimal, winnings)
             return Response({'outcome': outcome, 'winnings': winnings}, status=status.HTTP_200_OK)
+        except InsufficientFunds:
+            return Response({'error': 'Insufficient funds.'}, status=status.HTTP_400_BAD_REQUEST)
+        except (TypeError, decimal.InvalidOperation):
+            return Response({'error': 'Invalid bet amount.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class AutobetView(APIView, metaclass=abc.ABCMeta):
+    """
+    Plays up to ``rounds`` rounds of an instant game in one request, at a
+    fixed ``amount`` and ``choice``, stopping early at ``stop_loss`` /
+    ``take_profit`` (net, optional). ``results`` has one compact entry per
+    round played (see ``play_round``). Subclasses set ``game_name`` and
+    ``choices`` and implement ``play_round``.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_ROUNDS = 1000
+    game_name = None
+    choices = ()
+
+    @abc.abstractmethod
+    def play_round(self, choice):
+        """
+        Play one round; returns ``(result, payout_multiplier)``.
+        """
+
+    def post(self, request):
+        choice = request.data.get('choice')
+        if choice not in self.choices:
+            return Response({'error': f"choice must be one of: {', '.join(self.choices)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            amount = Decimal(str(request.data.get('amount')))
+            rounds = int(request.data.get('rounds', 1))
+            limits = {}
+            for name in ('stop_loss', 'take_profit'):
+                if request.data.get(name) not in (None, ''):
+                    limits[name] = Decimal(str(request.data.get(name)))
+                    if not limits[name].is_finite() or limits[name] <= 0:
+                        raise ValueError
+        except (TypeError, ValueError, decimal.InvalidOperation):
+            return Response({'error': 'Invalid amount, rounds or limits.'}, status=status.HTTP_400_BAD_REQUEST)
+        # NaN and sNaN parse fine but raise on comparison.
+        if not amount.is_finite() or amount <= 0:
+            return Response({'error': 'Invalid bet amount.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= rounds <= self.MAX_ROUNDS:
+            return Response({'error': f'rounds must be between 1 and {self.MAX_ROUNDS}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            run = play_autobet(request.user, self.game_name, amount, rounds, lambda: self.play_round(choice), **limits)
+        except InsufficientFunds:
+            return Response({'error': 'Insufficient funds.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'rounds': len(run.results),
+            'results': run.results,
+            'wagered': run.wagered,
+            'won': run.won,
+            'net': run.won - run.wagered,
+            'balance': run.balance,
+            'stopped': run.stopped,
+        }, status=status.HTTP_200_OK)
+
+class DiceAutobetView(AutobetView):
+    game_name = 'Dice'
+    choices = DICE_CHOICES
+
+    def play_round(self, choice):
+        # [die1, die2, multiplier]
+        die1, die2, payout_multiplier = roll_dice(choice)
+        return [die1, die2, payout_multiplier], payout_multiplier
+
+class CoinFlipAutobetView(AutobetView):
+    game_name = 'Coin Flip'
+    choices = COIN_SIDES
+
+    def play_round(self, choice):
+        # 'h' or 't'; the multiplier follows from the choice.
+        outcome, payout_multiplier = flip_coin(choice)
+        return outcome[0], payout_multiplier
+
 # --- HISTORY & OTHER VIEWS ---
 
 class TransactionHistoryView(APIView):
@@ -378,9 +537,12 @@ class TransactionHistoryView(APIView):
     def get(self, request):
         transactions = request.user.profile.transactions.filter(
             transaction_type__in=['deposit', 'withdraw', 'bet_placed', 'bet_won']
-        ).order_by('-timestamp')
-        serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
+        )
+        # Serializer fields applied to .values() rows, so no model instances are built.
+        fields = TransactionSerializer().fields
+        def to_item(row):
+            return {name: field.to_representation(row[name]) for name, field in fields.items()}
+        return history_response(request, transactions, list(fields), to_item, 'transactions')
 
 class ContactSubmissionView(APIView):
     permission_classes = [IsAuthenticated]
@@ -388,21 +550,24 @@ class ContactSubmissionView(APIView):
         message = request.data.get('message')
         if not message or not message.strip():
             return Response({'error': 'Message cannot be empty.'}, status=status.HTTP_400_BAD_REQUEST)
-        Contact.objects.create(user=request.user, message=message)
+        Contact.objects.create(user_id=request.user.id, message=message)
         return Response({'message': 'Your query has been submitted successfully.'}, status=status.HTTP_201_CREATED)
 
 class CasinoBetsHistoryView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        bets = CasinoBet.objects.filter(user_profile=request.user.profile).order_by('-timestamp')
-        data = [{'game_name': b.game_name, 'bet_amount': b.bet_amount, 'winnings': b.winnings, 'multiplier': b.multiplier, 'timestamp': b.timestamp.strftime('%d %b %Y, %I:%M %p')} for b in bets]
-        return Response(data)
+        bets = CasinoBet.objects.filter(user_profile=request.user.profile)
+        def to_item(b):
+            return {'game_name': b['game_name'], 'bet_amount': b['bet_amount'], 'winnings': b['winnings'], 'multiplier': b['multiplier'], 'timestamp': b['timestamp'].strftime('%d %b %Y, %I:%M %p')}
+        return history_response(request, bets, ['game_name', 'bet_amount', 'winnings', 'multiplier'], to_item, 'casino_bets')
 
 class MatchListView(generics.ListAPIView):
     """
-    API view to provide a list of upcoming matches.
+    API view to provide the list of matches, optionally filtered by
+    ``?status=`` and ``?date_from=`` / ``?date_to=`` (YYYY-MM-DD).
+    The serialized list is cached until a match changes, and sent with an
+    ETag and Last-Modified so unchanged lists get a 304.
     """
-    # We only want to show matches that are upcoming
     queryset = Matchess.objects.all().order_by('date', 'time') 
     
     # Use the new serializer to format the data
@@ -411,99 +576,293 @@ class MatchListView(generics.ListAPIView):
     # Ensure only authenticated users can see the matches
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        filters = {}
+        match_status = request.query_params.get('status')
+        if match_status:
+            if match_status not in dict(Matchess.STATUS_CHOICES):
+                return Response({'error': 'Invalid status.'}, status=status.HTTP_400_BAD_REQUEST)
+            filters['match_status'] = match_status
+        for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:
+                    day = None
+                if day is None:
+                    return Response({'error': f'{param} must be a YYYY-MM-DD date.'}, status=status.HTTP_400_BAD_REQUEST)
+                filters[lookup] = day.isoformat()
+
+        state = match_cache.get_state()
+        etag = match_cache.etag(state, filters)
+        last_modified = int(state['updated_at'].timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            data = match_cache.get_list(state, filters, lambda: list(
+                self.get_serializer(self.get_queryset().filter(**filters), many=True).data
+            ))
+            response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Clients may keep the list but must revalidate it on every use.
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class AsyncAuthenticatedView(View):
+    """
+    Base for async views that need a logged-in user (DRF's
+    ``IsAuthenticated``), authenticating the bearer token the way the DRF
+    views do.
+    """
 
-       
-
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            auth = await aauthenticate(request)
+        except AuthenticationFailed as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+            return JsonResponse(detail, status=status.HTTP_401_UNAUTHORIZED, headers={'WWW-Authenticate': 'Bearer realm="api"'})
+        if auth is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED, headers={'WWW-Authenticate': 'Bearer realm="api"'})
+        request.user, request.auth = auth
+        return await super().dispatch(request, *args, **kwargs)
 
 
-class MatchDetailView(APIView):
-    permission_classes = [IsAuthenticated]
+class MatchDetailView(AsyncAuthenticatedView):
+    """
+    Match details with its live score. Async, so a slow scorecard page
+    waits on the event loop instead of holding a worker thread.
+    """
 
-    def get(self, request, match_id):
+    async def get(self, request, match_id):
         try:
-            match = Matchess.objects.get(id=match_id)
+            match = await Matchess.objects.aget(id=match_id)
         except Matchess.DoesNotExist:
-            return Response({"error": "Match not found"}, status=404)
+            return JsonResponse({"error": "Match not found"}, status=404)
 
         # Call your scraper
-        score_data = get_live_score(match.url, match.Team1, match.Team2)
+        score_data = await aget_live_score_cached(
+            match.url, match.Team1, match.Team2, long_lived_loop=isinstance(request, ASGIRequest),
+        )
 
-        return Response({
+        return JsonResponse({
             "id": match.id,
             "match_name": match.match_name,
             "team_one": match.Team1,
             "team_two": match.Team2,
-            "start_time": match.start_time,
-            "status": match.status,
+            "date": match.date,
+            "time": match.time,
+            "status": match.match_status,
             "live_score": score_data
         })
       
-class LiveScoreAPIView(APIView):
+class LiveScoreAPIView(View):
     """
     API view to fetch live cricket scores by scraping a URL.
     """
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         # Get parameters from the request URL (e.g., /api/live-score/?url=...&team1=...&team2=...)
-        score_url = request.query_params.get('url', None)
-        team1 = request.query_params.get('team1', None)
-        team2 = request.query_params.get('team2', None)
+        score_url = request.GET.get('url', None)
+        team1 = request.GET.get('team1', None)
+        team2 = request.GET.get('team2', None)
 
         if not score_url:
-            return Response(
+            return JsonResponse(
                 {"error": "URL parameter is required."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         # Call the scraper function
-        data = get_live_score(url=score_url, team_1=team1, team_2=team2)
+        data = await aget_live_score_cached(
+            url=score_url, team_1=team1, team_2=team2, long_lived_loop=isinstance(request, ASGIRequest),
+        )
 
         # Check if the scraper returned an error
         if "error" in data:
-            return Response(data, status=status.HTTP_404_NOT_FOUND)
+            return JsonResponse(data, status=status.HTTP_404_NOT_FOUND)
 
         # Return the scraped data as a successful JSON response
-        return Response(data, status=status.HTTP_200_OK)
+        return JsonResponse(data, status=status.HTTP_200_OK)
 
 # def live_score_api(request, id):
 #     match = get_object_or_404(Matchess, match_id=id)
 #     live_score = get_live_score(match.url)
 #     return JsonResponse(live_score)
-class MatchLiveScoreAPIView(APIView):
+class MatchLiveScoreAPIView(View):
     """
     API view to fetch live score for a specific match ID from the database.
+    Scores are scraped in the background by ``manage.py ingest_scores``.
     """
-    def get(self, request, match_id, *args, **kwargs):
+    async def get(self, request, match_id, *args, **kwargs):
         # 1. Get the Match object from the database
         try:
-            match = Matchess.objects.get(match_id=match_id)
+            match = await Matchess.objects.only('url', 'Team1', 'Team2').aget(match_id=match_id)
         except Matchess.DoesNotExist:
-            return Response(
+            return JsonResponse(
                 {"error": f"Match with ID {match_id} not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
         # 2. Check if the match object has a URL
         if not match.url:
-            return Response(
+            return JsonResponse(
                 {"error": "This match does not have a score URL defined."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # 3. Read the snapshot published by the ingest_scores worker. This
+        #    never scrapes, so the request costs a cache lookup.
+        data = await aget_snapshot(url=match.url, team_1=match.Team1, team_2=match.Team2)
+        if data is None:
+            return JsonResponse(
+                {"error": "Live score is not available yet."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        # 4. Check for a scraper-specific error message
+        if "error" in data:
+            return JsonResponse(data, status=status.HTTP_404_NOT_FOUND)
+
+        # 5. Return the stored score
+        return JsonResponse(data, status=status.HTTP_200_OK)
+
+
+class MatchLiveScoresAPIView(APIView):
+    """
+    Live scores for several matches in one response, keyed by match ID.
+    Takes ``?ids=1,2,3`` (match IDs); without it, returns every Active match.
+    """
+    MAX_IDS = 50
+
+    def get(self, request, *args, **kwargs):
+        ids_param = request.query_params.get('ids')
+        if ids_param:
+            try:
+                match_ids = list(dict.fromkeys(int(i) for i in ids_param.split(',') if i.strip()))
+            except ValueError:
+                return Response({"error": "ids must be a comma-separated list of match IDs."}, status=status.HTTP_400_BAD_REQUEST)
+            if len(match_ids) > self.MAX_IDS:
+                return Response({"error": f"At most {self.MAX_IDS} matches per request."}, status=status.HTTP_400_BAD_REQUEST)
+            matches = Matchess.objects.filter(match_id__in=match_ids)
+        else:
+            match_ids = None
+            matches = Matchess.objects.filter(match_status='Active')
+
+        # One query for the matches, one cache round-trip for the scores.
+        matches = list(matches.only('match_id', 'url', 'Team1', 'Team2'))
+        with_url = [m for m in matches if m.url]
+        snapshots = get_snapshots([(m.url, m.Team1, m.Team2) for m in with_url])
+
+        data = {}
+        for match_id in match_ids or []:
+            data[str(match_id)] = {"error": f"Match with ID {match_id} not found."}
+        for match in matches:
+            data[str(match.match_id)] = {"error": "This match does not have a score URL defined."}
+        for match, snapshot in zip(with_url, snapshots):
+            data[str(match.match_id)] = snapshot if snapshot is not None else {"error": "Live score is not available yet."}
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class MatchScoreHistoryView(APIView):
+    """
+    Recorded score history of a match (see ``accounts.score_history``).
+
+    ``?at=<ISO datetime>`` returns the score the match had at that time.
+    Otherwise returns the changes after ``?cursor=`` (a ``seq``, default 0),
+    at most ``?limit=`` of them; pass the returned ``next_cursor`` next time
+    to get only what changed since.
+    """
+
+    def get(self, request, match_id, *args, **kwargs):
+        pk = Matchess.objects.filter(match_id=match_id).values_list('id', flat=True).first()
+        if pk is None:
+            return Response({"error": f"Match with ID {match_id} not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        at = request.query_params.get('at')
+        if at:
+            try:
+                when = parse_datetime(at)
+            except ValueError:
+                when = None
+            if when is None:
+                return Response({"error": "at must be an ISO 8601 datetime."}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(when):
+                when = timezone.make_aware(when)
+            state = score_history.state_at(pk, when)
+            if state is None:
+                return Response({"error": "No score was recorded by that time."}, status=status.HTTP_404_NOT_FOUND)
+            return Response(state, status=status.HTTP_200_OK)
+
         try:
-            # 3. Call the scraper function with the correct, capitalized field names
-            data = get_live_score(url=match.url, team_1=match.Team1, team_2=match.Team2)
+            cursor = max(0, int(request.query_params.get('cursor', 0)))
+            limit = max(1, min(int(request.query_params.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "cursor and limit must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        rows, next_cursor = score_history.changes_since(pk, cursor, limit)
+        return Response({'results': rows, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
 
-            # 4. Check for a scraper-specific error message
-            if "error" in data:
-                return Response(data, status=status.HTTP_404_NOT_FOUND)
-            
-            # 5. Return the scraped data successfully
-            return Response(data, status=status.HTTP_200_OK)
 
-        except Exception as e:
-            # 6. Catch any other unexpected errors during scraping
-            # This prevents your server from crashing if the external site is down or changes.
-            return Response(
-                {"error": "An unexpected error occurred while fetching the score.", "details": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+class MatchLiveScoreStreamView(View):
+    """
+    Server-Sent Events stream of a match's live score. Sends the current
+    snapshot on connect and then one event per change, so clients hold one
+    connection instead of polling. Needs an ASGI server (CricBet_main.asgi);
+    under WSGI it answers 501 straight away.
+    """
+    HEARTBEAT_SECONDS = 15
+
+    async def get(self, request, match_id, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            # Under WSGI, StreamingHttpResponse drains the async iterator
+            # before sending anything, so an endless stream would hang the
+            # worker. Fail fast; clients fall back to polling.
+            return JsonResponse(
+                {"error": f"Streaming needs an ASGI server; poll /api/v1/match-score/{match_id}/ instead."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        try:
+            match = await Matchess.objects.aget(match_id=match_id)
+        except Matchess.DoesNotExist:
+            return JsonResponse({"error": f"Match with ID {match_id} not found."}, status=404)
+        if not match.url:
+            return JsonResponse({"error": "This match does not have a score URL defined."}, status=400)
+
+        response = StreamingHttpResponse(
+            self.events(match, request.headers.get('Last-Event-ID')),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def events(self, match, last_event_id):
+        async with get_broadcaster().subscription(match.url, match.Team1, match.Team2) as queue:
+            while True:
+                try:
+                    entry = await asyncio.wait_for(queue.get(), self.HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if entry is None:
+                    yield f"data: {json.dumps({'error': 'Live score is not available yet.'})}\n\n"
+                    continue
+                event_id = f"{entry['version']}-{int(entry['fetched_at'])}"
+                if event_id == last_event_id:
+                    # A reconnecting client already has this snapshot.
+                    continue
+                yield f"id: {event_id}\ndata: {json.dumps(entry['data'])}\n\n"
+
+
+class LiveScoreCacheStatsView(APIView):
+    """
+    Hit/miss/latency counters of the live score cache for this worker process,
+    and the circuit breaker state of each scorecard host.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        data = score_cache_stats.snapshot()
+        data['hosts'] = scrape_guard.snapshot()
+        return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,109 @@
+"""
+Balance changes for casino bets.
+"""
+
+import decimal
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import F
+
+from .balance_cache import balance_changed
+from .ledger import LedgerBuffer, record_casino_bets
+from .models import CasinoBet, UserProfile
+
+
+class InsufficientFunds(Exception):
+    """
+    The balance is lower than the stake.
+    """
+
+
+def settle_instant_bet(user_profile, game_name, bet_amount, winnings):
+    """
+    Settle a bet whose outcome is already known (Dice, Coin Flip).
+
+    The stake is debited and the winnings credited by one conditional UPDATE
+    that only matches while ``balance >= bet_amount``, so concurrent bets can
+    never overdraw and no row lock is held across round-trips. The CasinoBet
+    and its ledger rows are written in the same transaction.
+    """
+    bet_amount = decimal.Decimal(bet_amount)
+    winnings = decimal.Decimal(winnings)
+    with transaction.atomic():
+        updated = UserProfile.objects.filter(pk=user_profile.pk, balance__gte=bet_amount).update(
+            balance=F('balance') - bet_amount + winnings
+        )
+        if not updated:
+            raise InsufficientFunds()
+        balance_changed(user_profile.user_id)
+        bet = CasinoBet(
+            user_profile=user_profile,
+            game_name=game_name,
+            bet_amount=bet_amount,
+            winnings=winnings,
+            multiplier=winnings / bet_amount if bet_amount > 0 else 0,
+        )
+        record_casino_bets([bet])
+        return bet
+
+
+class AutobetResult(NamedTuple):
+    results: list
+    wagered: decimal.Decimal
+    won: decimal.Decimal
+    balance: decimal.Decimal
+    # Why the run stopped: 'rounds' when every round was played, else
+    # 'stop_loss', 'take_profit' or 'insufficient_funds'.
+    stopped: str
+
+
+def play_autobet(user, game_name, bet_amount, rounds, play_round, stop_loss=None, take_profit=None):
+    """
+    Play up to ``rounds`` rounds of an instant game at a fixed stake.
+
+    ``play_round()`` returns ``(result, multiplier)``; ``result`` is what the
+    client gets back for that round. The profile row is locked once for the
+    whole run, the balance is written once at the end, and the bets and
+    their ledger rows go through a LedgerBuffer. The run stops early when the
+    balance no longer covers the stake, when the net loss reaches
+    ``stop_loss`` or when the net win reaches ``take_profit``.
+    """
+    bet_amount = decimal.Decimal(bet_amount)
+    results = []
+    wagered = won = decimal.Decimal(0)
+    stopped = 'rounds'
+    with transaction.atomic():
+        user_profile = UserProfile.objects.select_for_update().get(user_id=user.id)
+        balance = user_profile.balance
+        if balance < bet_amount:
+            raise InsufficientFunds()
+
+        with LedgerBuffer() as ledger:
+            for _ in range(rounds):
+                if balance < bet_amount:
+                    stopped = 'insufficient_funds'
+                    break
+                result, multiplier = play_round()
+                winnings = bet_amount * multiplier
+                balance += winnings - bet_amount
+                wagered += bet_amount
+                won += winnings
+                results.append(result)
+                ledger.add(CasinoBet(
+                    user_profile=user_profile,
+                    game_name=game_name,
+                    bet_amount=bet_amount,
+                    winnings=winnings,
+                    multiplier=multiplier,
+                ))
+                if stop_loss is not None and wagered - won >= stop_loss:
+                    stopped = 'stop_loss'
+                    break
+                if take_profit is not None and won - wagered >= take_profit:
+                    stopped = 'take_profit'
+                    break
+
+        UserProfile.objects.filter(pk=user_profile.pk).update(balance=balance)
+        balance_changed(user_profile.user_id, balance)
+    return AutobetResult(results, wagered, won, balance, stopped)
@@ -1,15 +1,17 @@
 from django.urls import path
 from accounts import views as UserViews
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from accounts.authentication import CricBetTokenObtainPairSerializer, CricBetTokenRefreshSerializer
 
 urlpatterns = [
     # 🔐 Auth & User
     path('register/', UserViews.RegisterView.as_view(), name='register'),
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/', TokenObtainPairView.as_view(serializer_class=CricBetTokenObtainPairSerializer), name='token_obtain_pair'),
+    path('token/refresh/', TokenRefreshView.as_view(serializer_class=CricBetTokenRefreshSerializer), name='token_refresh'),
     path('protected-view/', UserViews.ProtectedView.as_view(), name='protected_view'),
     path('user-profile/', UserViews.UserProfileView.as_view(), name='user_profile'),
     path('user-exposure/', UserViews.UserExposureView.as_view(), name='user-exposure'),
+    path('user-stats/', UserViews.UserStatsView.as_view(), name='user-stats'),
 
     # 🔢 OTP & Contact
     path('generate-otp/', UserViews.GenerateOTPView.as_view(), name='generate_otp'),
@@ -26,14 +28,21 @@ urlpatterns = [
 
     # 🎰 Casino
     path('casino/mines/bet/', UserViews.MinesBetView.as_view(), name='mines-bet'),
+    path('casino/mines/reveal/', UserViews.MinesRevealView.as_view(), name='mines-reveal'),
     path('casino/mines/cashout/', UserViews.MinesCashOutView.as_view(), name='mines-cashout'),
     path('casino/mines/loss/', UserViews.MinesLossView.as_view(), name='mines-loss'),
     path('casino/coin-flip/bet/', UserViews.CoinFlipBetView.as_view(), name='coin-flip-bet'),
+    path('casino/coin-flip/autobet/', UserViews.CoinFlipAutobetView.as_view(), name='coin-flip-autobet'),
     path('casino/dice/bet/', UserViews.DiceBetView.as_view(), name='dice-bet'),
+    path('casino/dice/autobet/', UserViews.DiceAutobetView.as_view(), name='dice-autobet'),
     path('bets/casino/', UserViews.CasinoBetsHistoryView.as_view(), name='casino-bets-history'),
    path('live-score/', UserViews.LiveScoreAPIView.as_view(), name='live-score'),
+    path('live-score/cache-stats/', UserViews.LiveScoreCacheStatsView.as_view(), name='live-score-cache-stats'),
     # 🏏 Matches (Unified under match-detail)
     path('matches/', UserViews.MatchListView.as_view(), name='match-list'),
     path('matches/<int:match_id>/detail/', UserViews.MatchDetailView.as_view(), name='match-detail'),
-     path('match-score/<int:match_id>/', UserViews.MatchLiveScoreAPIView.as_view(), name='live-score-by-id')
+     path('match-score/<int:match_id>/', UserViews.MatchLiveScoreAPIView.as_view(), name='live-score-by-id'),
+    path('match-scores/', UserViews.MatchLiveScoresAPIView.as_view(), name='live-scores'),
+    path('match-score/<int:match_id>/stream/', UserViews.MatchLiveScoreStreamView.as_view(), name='live-score-stream'),
+    path('match-score/<int:match_id>/history/', UserViews.MatchScoreHistoryView.as_view(), name='score-history'),
 ]
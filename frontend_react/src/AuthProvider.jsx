@@ -26,13 +26,14 @@ const AuthProvider = ({ children }) => {
             const [profileRes, exposureRes, historyRes] = await Promise.all([
                 api.get('/user-profile/'),
                 api.get('/user-exposure/'),
-                api.get('/transaction-history/')
+                // The header only lists the latest few transactions.
+                api.get('/transaction-history/', { params: { limit: 5 } })
             ]);
             
             // Set the state for each piece of data
             setUser(profileRes.data);
             setExposure(exposureRes.data.exposure);
-            setTransactions(historyRes.data);
+            setTransactions(historyRes.data.results);
             setIsLoggedIn(true);
         } catch (error) {
             console.error("Failed to fetch user data:", error);
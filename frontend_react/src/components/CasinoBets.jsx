@@ -7,26 +7,35 @@ import { faArrowLeft, faSpinner } from '@fortawesome/free-solid-svg-icons';
 const CasinoBets = () => {
     const [bets, setBets] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // Without a cursor this loads the newest page; with one it appends the
+    // next page of older bets.
+    const fetchBets = async (cursor = null) => {
+        try {
+            const response = await api.get('/bets/casino/', { params: cursor ? { cursor } : {} });
+            const results = Array.isArray(response.data.results) ? response.data.results : [];
+            setBets(prev => cursor ? [...prev, ...results] : results);
+            setNextCursor(response.data.next_cursor || null);
+        } catch (error) {
+            console.error("Failed to fetch casino bets:", error);
+            if (!cursor) setBets([]);
+        } finally {
+            setLoading(false);
+        }
+    };
 
     useEffect(() => {
-        const fetchBets = async () => {
-            try {
-                const response = await api.get('/bets/casino/');
-                if (Array.isArray(response.data)) {
-                    setBets(response.data);
-                } else {
-                    setBets([]);
-                }
-            } catch (error) {
-                console.error("Failed to fetch casino bets:", error);
-                setBets([]);
-            } finally {
-                setLoading(false);
-            }
-        };
         fetchBets();
     }, []);
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        await fetchBets(nextCursor);
+        setLoadingMore(false);
+    };
+
     const parseNumber = (value) => {
         if (typeof value === 'string') {
             value = value.replace(/[^0-9.-]+/g, ''); // remove any non-numeric chars
@@ -101,6 +110,13 @@ const CasinoBets = () => {
                         )}
                     </tbody>
                 </table>
+                {!loading && nextCursor && (
+                    <div className="text-center mt-3">
+                        <button className="btn btn-outline-info" onClick={loadMore} disabled={loadingMore}>
+                            {loadingMore ? <FontAwesomeIcon icon={faSpinner} spin /> : 'Load more'}
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
@@ -25,14 +25,10 @@ const Main = () => {
     const updateScores = async (currentMatches) => {
       if (currentMatches.length === 0) return; // Don't run if there are no matches
       try {
-        const scorePromises = currentMatches.map(async (match) => {
-          const scoreResponse = await api.get(`/match-score/${match.match_id}/`);
-          return { id: match.match_id, score: scoreResponse.data };
-        });
-        const scores = await Promise.all(scorePromises);
-        const scoreMap = {};
-        scores.forEach(s => { scoreMap[s.id] = s.score; });
-        setLiveScores(scoreMap); // Update the state with new scores
+        // One request for every listed match instead of one per match.
+        const ids = currentMatches.map(match => match.match_id).join(',');
+        const scoreResponse = await api.get('/match-scores/', { params: { ids } });
+        setLiveScores(scoreResponse.data); // Keyed by match_id
       } catch (err) {
         console.error("Failed to update live scores:", err);
       }
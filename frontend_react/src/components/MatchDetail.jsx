@@ -27,17 +27,64 @@ const [isModalOpen, setIsModalOpen] = useState(false);
         setScore(response.data);
         setError(''); 
       } catch (err) {
-        console.error("Failed to fetch live score:", err); // This is where your error was coming from
+        console.error("Failed to fetch live score:", err);
         setError('Could not retrieve live score. The data may not be available for this match.');
       } finally {
         setLoading(false);
       }
     };
 
-    fetchScore(); 
-    const interval = setInterval(fetchScore, 5000);
-    
-    return () => clearInterval(interval);
+    let source = null;
+    let interval = null;
+    let firstEventTimer = null;
+
+    // Fallback when the stream is not served (e.g. `manage.py runserver`,
+    // which answers it with 501) or never delivers an event.
+    const startPolling = () => {
+      if (interval) return;
+      clearTimeout(firstEventTimer);
+      if (source) source.close();
+      fetchScore();
+      interval = setInterval(fetchScore, 5000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+    } else {
+      // The server pushes a new snapshot only when the score changes, so one
+      // open connection replaces polling. EventSource reconnects on its own.
+      source = new EventSource(`${api.defaults.baseURL}/match-score/${matchId}/stream/`);
+
+      // The current snapshot is sent on connect, so silence means no stream.
+      firstEventTimer = setTimeout(startPolling, 5000);
+
+      source.onmessage = (event) => {
+        clearTimeout(firstEventTimer);
+        const data = JSON.parse(event.data);
+        if (data.error) {
+          setError('Could not retrieve live score. The data may not be available for this match.');
+        } else {
+          setScore(data);
+          setError('');
+        }
+        setLoading(false);
+      };
+
+      source.onerror = (err) => {
+        console.error("Live score stream interrupted:", err);
+        // CLOSED means the browser gave up (a non-200 answer); otherwise
+        // it is already reconnecting.
+        if (source.readyState === EventSource.CLOSED) {
+          startPolling();
+        }
+      };
+    }
+
+    return () => {
+      clearTimeout(firstEventTimer);
+      clearInterval(interval);
+      if (source) source.close();
+    };
 
   }, [matchId]); 
   const handleOpenModal = (team, odds) => {
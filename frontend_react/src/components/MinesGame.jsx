@@ -43,13 +43,6 @@ const MinesGame = () => {
         setGrid(newGrid);
     };
 
-    const calculateMultiplier = (gems, mines) => {
-        if (gems === 0) return 1.0;
-        const safeTiles = GRID_SIZE - mines;
-        const probability = Array.from({ length: gems }).reduce((acc, _, i) => acc * ((safeTiles - i) / (GRID_SIZE - i)), 1);
-        return parseFloat((0.95 / probability).toFixed(2));
-    };
-
     const handleStartGame = async () => {
         if (!user || user.balance < betAmount) {
             setError("Insufficient balance.");
@@ -64,12 +57,13 @@ const MinesGame = () => {
         setError('');
         setFinalMultiplier(null); // Reset the final multiplier display
         try {
-            const response = await api.post('/casino/mines/bet/', {
+            await api.post('/casino/mines/bet/', {
                 amount: betAmount,
                 mines: numMines
             });
             
-            setGrid(response.data.grid);
+            // Mine positions stay on the server; every tile starts hidden.
+            initializeGrid();
             setGameState('playing');
             setGemsFound(0);
             setCurrentMultiplier(1.0);
@@ -81,25 +75,38 @@ const MinesGame = () => {
         }
     };
 
-    const handleTileClick = (index) => {
-        if (gameState !== 'playing' || grid[index].isRevealed) return;
+    // Shows every mine once the game is over, keeping the gems already found.
+    const revealBoard = (mineTiles) => {
+        setGrid(prev => prev.map(tile => ({
+            ...tile,
+            isMine: mineTiles.includes(tile.id),
+            isRevealed: true,
+        })));
+    };
 
-        const newGrid = [...grid];
-        const tile = newGrid[index];
-        tile.isRevealed = true;
+    const handleTileClick = async (index) => {
+        if (gameState !== 'playing' || grid[index].isRevealed || loading) return;
 
-        if (tile.isMine) {
-            sounds.bomb.triggerAttackRelease('C1', '4n');
-            setGameState('lost');
-            setFinalMultiplier(0); // Set final multiplier to 0 on loss
-            newGrid.forEach(t => t.isRevealed = true);
-        } else {
-            sounds.gem.triggerAttackRelease('G5', '16n');
-            const newGemsFound = gemsFound + 1;
-            setGemsFound(newGemsFound);
-            setCurrentMultiplier(calculateMultiplier(newGemsFound, numMines));
+        setLoading(true);
+        try {
+            const response = await api.post('/casino/mines/reveal/', { tile: index });
+
+            if (response.data.outcome === 'mine') {
+                sounds.bomb.triggerAttackRelease('C1', '4n');
+                setGameState('lost');
+                setFinalMultiplier(0); // Set final multiplier to 0 on loss
+                revealBoard(response.data.mine_tiles);
+            } else {
+                sounds.gem.triggerAttackRelease('G5', '16n');
+                setGrid(prev => prev.map(tile => tile.id === index ? { ...tile, isRevealed: true } : tile));
+                setGemsFound(response.data.safe_reveals);
+                setCurrentMultiplier(parseFloat(response.data.multiplier));
+            }
+        } catch (err) {
+            setError(err.response?.data?.error || "Failed to reveal tile.");
+        } finally {
+            setLoading(false);
         }
-        setGrid(newGrid);
     };
 
     const handleCashOut = async () => {
@@ -108,13 +115,11 @@ const MinesGame = () => {
         setLoading(true);
         try {
             sounds.cashout.triggerAttackRelease(['C5', 'E5', 'G5'], '8n');
-            const winnings = betAmount * currentMultiplier;
+            // The server works out the payout from the tiles it has seen.
+            const response = await api.post('/casino/mines/cashout/');
 
-            await api.post('/casino/mines/cashout/', { winnings });
-            
-            const finalGrid = grid.map(tile => ({ ...tile, isRevealed: true }));
-            setGrid(finalGrid);
-            setFinalMultiplier(currentMultiplier); // Set the final multiplier for display
+            revealBoard(response.data.mine_tiles);
+            setFinalMultiplier(parseFloat(response.data.multiplier)); // Set the final multiplier for display
             
             await fetchUserData();
             setGameState('finished');
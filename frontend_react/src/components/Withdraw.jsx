@@ -18,15 +18,27 @@ const Withdraw = () => {
     const [pastRequests, setPastRequests] = useState([]);
     const [isRejected, setIsRejected] = useState(false); // State for the rejected flow
 
-    const fetchHistory = async () => {
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // Without a cursor this (re)loads the newest page; with one it appends
+    // the next page of older requests.
+    const fetchHistory = async (cursor = null) => {
         try {
-            const response = await api.get('/withdraw/history/');
-            setPastRequests(response.data);
+            const response = await api.get('/withdraw/history/', { params: cursor ? { cursor } : {} });
+            setPastRequests(prev => cursor ? [...prev, ...response.data.results] : response.data.results);
+            setNextCursor(response.data.next_cursor);
         } catch (err) {
             console.error("Could not fetch withdrawal history", err);
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        await fetchHistory(nextCursor);
+        setLoadingMore(false);
+    };
+
     useEffect(() => {
         fetchHistory();
     }, []);
@@ -213,6 +225,13 @@ const Withdraw = () => {
                             )}
                         </tbody>
                     </table>
+                    {nextCursor && (
+                        <div className="text-center mt-3">
+                            <button className="btn btn-outline-info" onClick={loadMore} disabled={loadingMore}>
+                                {loadingMore ? 'Loading...' : 'Load more'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
         </div>